@@ -1,189 +1,342 @@
 # backend/app.py
 
-from flask import Flask, request, jsonify
+import json
+import logging
+import os
+import threading
+import torch
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from utils import http_client
 from utils.text_retrieval import retrieve_post_text
+from utils.knowledge_graph import wikidata_client
 from utils.text_preprocessing import preprocess_text, split_into_sentences
-from models.ensemble_claim_detection_model import EnsembleClaimDetectionModel
-from models.advanced_claim_verification_model import AdvancedClaimVerificationModel
-from models.multi_hop_reasoning_model import MultiHopReasoningModel
-from models.question_answering_model import QuestionAnsweringModel
-from utils.evidence_retrieval import retrieve_evidence
-from utils.relevance_filtering import RelevanceFilter
-from utils.similarity import SimilarityCalculator
-from utils.knowledge_graph import query_wikidata, extract_texts_from_kg_results
-import time
+from utils.cache import disk_cache
+from pipeline import FactChecker
+from batch import BatchRun, parse_item
+from jobs import JobQueue, QueueFullError
+from models.registry import build_registry
+from models.serving import batching_stats
+from utils.metrics import merge_snapshots, render_histogram, render_value
+from utils.profiling import stage_seconds, timed, tracing, summarize_trace
+from config import JOB_THREADS_PER_WORKER, VERDICT_CACHE_ENABLED, LOG_LEVEL, BULK_MAX_DOCUMENTS, CLAIM_WORKERS
+
+logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize models
-claim_detector = EnsembleClaimDetectionModel()
-claim_verifier = AdvancedClaimVerificationModel()
-similarity_calculator = SimilarityCalculator()
-relevance_filter = RelevanceFilter(model=similarity_calculator.model)
-multi_hop_reasoner = MultiHopReasoningModel()
-qa_model = QuestionAnsweringModel()
+# Load models in parallel in the background; /ready reports when they are available
+model_registry = build_registry().start()
+claim_detector = model_registry.handle('claim_detector')
+claim_verifier = model_registry.handle('claim_verifier')
+similarity_calculator = model_registry.handle('similarity_calculator')
+relevance_filter = model_registry.handle('relevance_filter')
+multi_hop_reasoner = model_registry.handle('multi_hop_reasoner')
+qa_model = model_registry.handle('qa_model')
 
-@app.route('/analyze', methods=['POST'])
-def analyze():
-    data = request.get_json()
+verdict_store = model_registry.handle('verdict_store') if VERDICT_CACHE_ENABLED else None
+
+retriever = model_registry.handle('retriever')
+
+fact_checker = FactChecker(claim_detector, claim_verifier, similarity_calculator, relevance_filter,
+                           multi_hop_reasoner, qa_model, verdict_store=verdict_store, retriever=retriever)
+
+# /analyze/batch gets its own claim pool, sized like batch_analyze.py's: a bulk request queues far more
+# claims than an interactive one, and must neither wait behind nor hold up /analyze and /analyze/stream
+bulk_fact_checker = FactChecker(claim_detector, claim_verifier, similarity_calculator, relevance_filter,
+                                multi_hop_reasoner, qa_model, max_workers=CLAIM_WORKERS * 4,
+                                verdict_store=verdict_store, retriever=retriever)
+
+def total_cascade_stats():
+    stats = fact_checker.cascade_stats()
+    for name, value in bulk_fact_checker.cascade_stats().items():
+        stats[name] += value
+    return stats
+
+def load_sentences(data):
+    """
+    Retrieves and preprocesses the text of a request.
+    Returns (sentences, None) or (None, error message).
+    """
     url = data.get('url')
     text = data.get('text')
 
     if not url and not text:
-        return jsonify({'error': 'No URL or text provided.'}), 400
+        return None, 'No URL or text provided.'
 
     # Step 1: Text Retrieval
     if url:
-        print(f"Received request to analyze URL: {url}")
+        logger.info("Received request to analyze URL: %s", url)
         text = retrieve_post_text(url)
         if not text:
-            print("Unable to retrieve text from the provided URL.")
-            return jsonify({'error': 'Unable to retrieve text from the provided URL.'}), 400
+            logger.info("Unable to retrieve text from %s", url)
+            return None, 'Unable to retrieve text from the provided URL.'
     else:
-        print(f"Received text for analysis.")
-
-    print(f"Text to be analyzed: {text}")
+        logger.info("Received text for analysis (%d chars)", len(text))
 
     # Step 2: Text Preprocessing
-    cleaned_text = preprocess_text(text)
-    sentences = split_into_sentences(cleaned_text)
-    print(f"Preprocessed Text: {cleaned_text}")
-    print(f"Split into Sentences: {sentences}")
+    with timed('preprocess'):
+        cleaned_text = preprocess_text(text)
+        sentences = split_into_sentences(cleaned_text)
+    logger.debug("Split %d chars into %d sentences", len(cleaned_text), len(sentences))
+    return sentences, None
 
-    # Step 3: Claim Detection
-    claims = []
-    for sentence in sentences:
-        predicted_class, predicted_label, confidence = claim_detector.predict(sentence)
-        print(f"Analyzing Sentence: {sentence}")
-        print(f"Predicted Class: {predicted_class}, Label: {predicted_label}, Confidence: {confidence}")
-        if predicted_class == 1:
-            claims.append({'sentence': sentence, 'confidence': confidence, 'label': predicted_label})
+def run_analysis(data):
+    """
+    Runs the full pipeline on a request body. Returns (response body, HTTP status).
+    With 'trace': true in the body, the response includes the time spent in each stage.
+    """
+    with tracing(bool(data and data.get('trace'))) as trace:
+        body, status = _run_analysis(data)
+    if trace is not None:
+        body['trace'] = summarize_trace(trace)
+    return body, status
 
+def _run_analysis(data):
+    sentences, error = load_sentences(data)
+    if error:
+        return {'error': error}, 400
+
+    # Step 3: Claim Detection
+    claims = fact_checker.detect_claims(sentences)
     if not claims:
-        print("No factual claims detected in the text.")
-        return jsonify({'message': 'No factual claims detected in the text.'}), 200
-
-    print(f"Detected Claims: {claims}")
-
-    # Step 4 and 5: Evidence Retrieval and Relevance Filtering
-    verifications = []
-    for claim in claims:
-        print(f"Retrieving evidence for claim: {claim['sentence']}")
-        evidence_list = retrieve_evidence(claim['sentence'])
-        print(f"Evidence List: {evidence_list}")
-        if not evidence_list:
-            print(f"No evidence found for claim: {claim['sentence']}")
-            continue  # Skip if no evidence found
-
-        relevant_evidences = []
-        evidence_sources = []  # Collect evidence sources (URLs or 'Wikidata')
-
-        # Process evidence from web search
-        for evidence in evidence_list:
-            full_content = evidence['content']
-            if not full_content:
-                continue  # Skip if no content was fetched
-
-            # Extract relevant passages
-            relevant_text = relevance_filter.extract_relevant_passages(claim['sentence'], full_content, top_k=9)
-            if not relevant_text:
-                continue  # Skip if no relevant passages found
-
-            # Compute similarity between claim and extracted passages
-            similarity_score = similarity_calculator.compute_similarity(claim['sentence'], relevant_text)
-
-            threshold = 0.3  # Adjust as needed
-            if similarity_score >= threshold:
-                relevant_evidences.append(relevant_text)
-                evidence_sources.append(evidence['url'])  # Use 'url' instead of 'link'
-            else:
-                print(f"Evidence not relevant enough (similarity: {similarity_score})")
-
-        # Knowledge Graph Query
-        print(f"Querying knowledge graph for claim: {claim['sentence']}")
-        kg_results = query_wikidata(claim['sentence'])
-        kg_evidences = extract_texts_from_kg_results(kg_results)
-        if kg_evidences:
-            relevant_evidences.extend(kg_evidences)
-            # Since KG results don't have URLs, we can use 'Wikidata' or specific item URLs
-            for result in kg_results.get("results", {}).get("bindings", []):
-                item_url = result["item"]["value"]  # This is the URL to the Wikidata item
-                evidence_sources.append(item_url)
-        # Add a delay to prevent rate limiting
-        time.sleep(1)
-
-        if not relevant_evidences:
-            print(f"No relevant evidences found for claim: {claim['sentence']}")
-            continue
-
-        # Use QA Model for Fact Extraction
-        for idx, evidence_text in enumerate(relevant_evidences):
-            answer, score = qa_model.extract_answer(claim['sentence'], evidence_text)
-            if score > 0.01:  # Threshold for accepting the answer
-                # Verify the claim against the extracted answer
-                predicted_label, confidence = claim_verifier.verify(claim['sentence'], answer)
-                print(f"Verification Result - Label: {predicted_label}, Confidence: {confidence}")
-                verifications.append({
-                    'claim': claim['sentence'],
-                    'evidence': evidence_text,
-                    'evidence_source': evidence_sources[idx],  # Include the source URL
-                    'label': predicted_label,
-                    'confidence': confidence
-                })
-            else:
-                print(f"No relevant answer found in evidence with score {score}")
-
-        # Use Multi-Hop Reasoning for complex claims
-        if len(relevant_evidences) > 1:
-            answer = multi_hop_reasoner.reason_over_evidence(claim['sentence'], relevant_evidences)
-            predicted_label, confidence = claim_verifier.verify(claim['sentence'], answer)
-            print(f"Multi-Hop Verification Result - Label: {predicted_label}, Confidence: {confidence}")
-            # Include all evidence sources used in multi-hop reasoning
-            verifications.append({
-                'claim': claim['sentence'],
-                'evidence': answer,
-                'evidence_source': evidence_sources,  # Include the list of all sources used
-                'label': predicted_label,
-                'confidence': confidence
-            })
-
-    if not verifications:
-        print("No evidence found for the claims.")
-        return jsonify({'message': 'No evidence found for the claims.'}), 200
-
-    # Step 6: Aggregation of Results
-    final_results = []
-    for claim in claims:
-        claim_verifications = [v for v in verifications if v['claim'] == claim['sentence']]
-        if claim_verifications:
-            # Simple majority voting
-            labels = [v['label'] for v in claim_verifications]
-            final_label = max(set(labels), key=labels.count)
-            average_confidence = sum([v['confidence'] for v in claim_verifications]) / len(claim_verifications)
-            # Collect evidence links for this claim
-            # Flatten the evidence sources if they are lists (from multi-hop reasoning)
-            claim_evidence_links = []
-            for v in claim_verifications:
-                if isinstance(v['evidence_source'], list):
-                    claim_evidence_links.extend(v['evidence_source'])
-                else:
-                    claim_evidence_links.append(v['evidence_source'])
-            # Remove duplicates
-            claim_evidence_links = list(set(claim_evidence_links))
-            final_results.append({
-                'claim': claim['sentence'],
-                'classification': final_label,
-                'confidence': average_confidence,
-                'evidence_links': claim_evidence_links  # Include evidence links here
-            })
+        logger.info("No factual claims detected in %d sentences", len(sentences))
+        return {'message': 'No factual claims detected in the text.'}, 200
+
+    logger.info("Detected %d claims in %d sentences", len(claims), len(sentences))
 
+    # Step 4 to 6: Evidence Retrieval, Relevance Filtering, Verification and Aggregation
+    final_results = fact_checker.check_claims(claims)
     if not final_results:
-        print("No verifiable claims found.")
-        return jsonify({'message': 'No verifiable claims found.'}), 200
+        logger.info("None of the %d claims could be verified", len(claims))
+        return {'message': 'No verifiable claims found.'}, 200
+
+    return {'results': [result.to_dict() for result in final_results]}, 200
+
+def run_job(data):
+    body, status = run_analysis(data)
+    return {'status_code': status, **body}
+
+def init_job_worker():
+    # Runs in each forked worker: SQLite connections and the threads of the parent's pools cannot cross a fork
+    disk_cache.reopen()
+    http_client.reopen()
+    wikidata_client.reopen()
+    fact_checker.reopen()
+    bulk_fact_checker.reopen()
+    for model in model_registry.loaded().values():
+        if hasattr(model, 'reopen'):
+            model.reopen()
+    torch.set_num_threads(JOB_THREADS_PER_WORKER)
+
+def local_metrics():
+    """
+    Stage and batching histograms and cascade counters of this process.
+    """
+    return {
+        'stages': {stage: histogram.snapshot() for stage, histogram in stage_seconds.items()},
+        'batching': batching_stats(*model_registry.loaded().values()),
+        'cascade': total_cascade_stats()
+    }
+
+def collect_metrics():
+    """
+    local_metrics() summed with the latest snapshot of every forked job worker, which
+    each sends back with the result of the jobs it runs.
+    """
+    merged = local_metrics()
+    for snapshot in job_queue.worker_metrics():
+        for stage, histogram in snapshot['stages'].items():
+            merged['stages'][stage] = merge_snapshots(merged['stages'][stage], histogram)
+        for model, stats in snapshot['batching'].items():
+            if model not in merged['batching']:
+                merged['batching'][model] = stats
+                continue
+            merged['batching'][model] = {name: merge_snapshots(merged['batching'][model][name], histogram)
+                                         for name, histogram in stats.items()}
+        for name, value in snapshot['cascade'].items():
+            merged['cascade'][name] += value
+    return merged
+
+job_queue = JobQueue(run_job, initializer=init_job_worker, snapshot=local_metrics)
+
+def start_job_workers():
+    """
+    Forks the job workers once the models are loaded. Runs once per serving process at startup,
+    never from a request; jobs submitted meanwhile wait in the queue.
+    """
+    model_registry.wait()
+    if job_queue.mode == 'fork' and job_queue.workers:
+        # Deferred models are loaded here too: loaded on first use in a worker, each worker would
+        # hold its own copy instead of sharing the parent's weights
+        model_registry.wait(include_deferred=True)
+    job_queue.start()
+
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    # Under a WSGI server or `flask run`, or in the serving process of `python app.py` (not the reloader's
+    # watcher): requests are served while the models load, so /ready reports 503 until then
+    threading.Thread(target=start_job_workers, name='job-workers-start', daemon=True).start()
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    data = request.get_json()
+    if data is not None and request.args.get('trace') == '1':
+        data['trace'] = True
+    body, status = run_analysis(data)
+    return jsonify(body), status
+
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_stream():
+    """
+    Streams NDJSON events: the detected claims first, then one 'result' event per
+    claim as soon as it has been verified, and a final 'done' event.
+    """
+    sentences, error = load_sentences(request.get_json())
+    if error:
+        return jsonify({'error': error}), 400
+
+    def generate():
+        claims = fact_checker.detect_claims(sentences)
+        if not claims:
+            yield json.dumps({'type': 'message', 'message': 'No factual claims detected in the text.'}) + '\n'
+            return
+        yield json.dumps({'type': 'claims', 'claims': [claim.to_dict() for claim in claims]}) + '\n'
+
+        verified = 0
+        for claim, result in fact_checker.iter_claim_results(claims):
+            if result is None:
+                yield json.dumps({'type': 'unverified', 'claim': claim.sentence}) + '\n'
+            else:
+                verified += 1
+                yield json.dumps({'type': 'result', 'result': result.to_dict()}) + '\n'
+
+        if not verified:
+            yield json.dumps({'type': 'message', 'message': 'No verifiable claims found.'}) + '\n'
+        yield json.dumps({'type': 'done', 'verified': verified, 'total': len(claims)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    Fact-checks many documents in one request. The body is NDJSON (one {"text"} or {"url"}
+    object, bare URL or text per line) or a JSON list of such objects. Streams one NDJSON
+    record per document in input order, then a 'done' event with the throughput.
+    """
+    if request.is_json:
+        data = request.get_json()
+        items = data if isinstance(data, list) else (data or {}).get('items')
+    else:
+        items = [parse_item(line) for line in request.get_data(as_text=True).splitlines()]
+        items = [item for item in items if item is not None]
+    if not items or not isinstance(items, list):
+        return jsonify({'error': 'No documents provided.'}), 400
+    if len(items) > BULK_MAX_DOCUMENTS:
+        return jsonify({'error': f'At most {BULK_MAX_DOCUMENTS} documents per request.'}), 413
+
+    run = BatchRun(bulk_fact_checker, items)
+
+    def generate():
+        for record in run:
+            yield json.dumps({'type': 'result', **record}) + '\n'
+        summary = run.summary()
+        logger.info("Batch of %d documents done in %.1fs (%.2f docs/s)",
+                    summary['documents'], summary['seconds'], summary['docs_per_second'])
+        yield json.dumps({'type': 'done', **summary}) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    data = request.get_json()
+    if not data or not (data.get('url') or data.get('text')):
+        return jsonify({'error': 'No URL or text provided.'}), 400
+    try:
+        job_id = job_queue.submit(data)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 429
+    return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+@app.route('/jobs/metrics', methods=['GET'])
+def job_metrics():
+    return jsonify(job_queue.metrics()), 200
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job.'}), 404
+    return jsonify(job), 200
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    if not job_queue.cancel(job_id):
+        return jsonify({'error': 'Job not found or already finished.'}), 404
+    return jsonify(job_queue.get(job_id)), 200
+
+@app.route('/batching/stats', methods=['GET'])
+def batch_stats():
+    return jsonify(collect_metrics()['batching']), 200
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    status_code = 200 if model_registry.is_ready() else 503
+    return jsonify({'ready': status_code == 200, 'models': model_registry.status()}), status_code
+
+@app.route('/cascade/stats', methods=['GET'])
+def cascade_stats():
+    return jsonify(collect_metrics()['cascade']), 200
+
+@app.route('/verdicts/stats', methods=['GET'])
+def verdict_stats():
+    if verdict_store is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **verdict_store.stats()}), 200
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(disk_cache.stats()), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    All counters and latency histograms in the Prometheus text exposition format, with
+    the work of the forked job workers included.
+    """
+    collected = collect_metrics()
+    lines = ['# TYPE veriboard_stage_seconds histogram']
+    for stage, snapshot in collected['stages'].items():
+        lines.extend(render_histogram('veriboard_stage_seconds', snapshot, {'stage': stage}))
+
+    batching = collected['batching']
+    lines.append('# TYPE veriboard_batch_size histogram')
+    for model, stats in batching.items():
+        lines.extend(render_histogram('veriboard_batch_size', stats['batch_size'], {'model': model}))
+    lines.append('# TYPE veriboard_batch_queue_wait_ms histogram')
+    for model, stats in batching.items():
+        lines.extend(render_histogram('veriboard_batch_queue_wait_ms', stats['queue_wait_ms'], {'model': model}))
+
+    cache = disk_cache.stats()
+    for field in ('hits', 'misses', 'stale', 'entries', 'bytes'):
+        lines.append(f'# TYPE veriboard_cache_{field} {"gauge" if field in ("entries", "bytes") else "counter"}')
+        for namespace, stats in cache.items():
+            lines.append(render_value(f'veriboard_cache_{field}', stats[field], {'namespace': namespace}))
+
+    for name, value in job_queue.metrics().items():
+        if isinstance(value, (int, float)):
+            lines.append(render_value(f'veriboard_jobs_{name}', value))
+
+    for name, value in collected['cascade'].items():
+        lines.append(render_value(f'veriboard_cascade_{name}', value))
+
+    if verdict_store is not None:
+        for name, value in verdict_store.stats().items():
+            lines.append(render_value(f'veriboard_verdicts_{name}', value))
 
-    return jsonify({'results': final_results}), 200
+    lines.append(render_value('veriboard_models_ready', int(model_registry.is_ready())))
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(debug=True)
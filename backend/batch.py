@@ -0,0 +1,218 @@
+# backend/batch.py
+
+import json
+import logging
+import queue
+import threading
+import time
+from utils.http_client import submit
+from utils.text_retrieval import retrieve_post_text
+from utils.text_preprocessing import preprocess_text, split_many
+from utils.profiling import timed
+from config import BULK_BATCH_DOCUMENTS, BULK_QUEUE_BATCHES
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+def parse_item(line):
+    """
+    Reads one input line: a JSON object with 'text' or 'url' (and an optional 'id'),
+    or else a bare URL or text. Returns None for blank lines.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith('{'):
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            pass
+    if line.startswith(('http://', 'https://')) and ' ' not in line:
+        return {'url': line}
+    return {'text': line}
+
+class Document:
+    """
+    One input item and what the stages have produced for it so far.
+    """
+    __slots__ = ('index', 'item', 'sentences', 'claims', 'futures', 'error')
+
+    def __init__(self, index, item):
+        self.index = index
+        self.item = item
+        self.sentences = None
+        self.claims = None
+        self.futures = None
+        self.error = None
+
+    def record(self):
+        """
+        The output line of the document, shaped like a /jobs result.
+        """
+        record = {'index': self.index}
+        if isinstance(self.item, dict) and 'id' in self.item:
+            record['id'] = self.item['id']
+        if self.error is not None:
+            status, message = self.error
+            return {**record, 'status_code': status, 'error': message}
+        if not self.claims:
+            return {**record, 'status_code': 200, 'message': 'No factual claims detected in the text.'}
+        try:
+            results = [result.to_dict() for result in (future.result() for future in self.futures) if result is not None]
+        except Exception as e:
+            logger.exception("Verification of document %d failed", self.index)
+            return {**record, 'status_code': 500, 'error': str(e)}
+        if not results:
+            return {**record, 'status_code': 200, 'message': 'No verifiable claims found.'}
+        return {**record, 'status_code': 200, 'results': results}
+
+class BatchRun:
+    """
+    Fact-checks a stream of documents as a pipeline of stages connected by bounded
+    queues: loading and sentence splitting, claim detection, and verification. Each
+    stage handles batch_size documents at a time, so their sentences go through the
+    claim detector together and their claims share one evidence plan. Iterating the
+    run yields one record per document, in input order, as soon as it is verified.
+    """
+    def __init__(self, fact_checker, items, batch_size=BULK_BATCH_DOCUMENTS, queue_batches=BULK_QUEUE_BATCHES):
+        self.fact_checker = fact_checker
+        self.items = items
+        self.batch_size = batch_size
+        self.queue_batches = queue_batches
+        self.stopped = threading.Event()
+        self.counters = {'documents': 0, 'failed': 0, 'claims': 0, 'verified': 0}
+        self.started = None
+        self.finished = None
+
+    def __iter__(self):
+        self.started = time.perf_counter()
+        loaded = queue.Queue(maxsize=self.queue_batches)
+        detected = queue.Queue(maxsize=self.queue_batches)
+        submitted = queue.Queue(maxsize=self.queue_batches)
+        stages = [
+            threading.Thread(target=self._run_stage, args=(self._load, self._batches(), loaded), daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._detect, self._drain(loaded), detected), daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._verify, self._drain(detected), submitted), daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
+        try:
+            # Batches leave every stage in the order they entered, so records come out in input order
+            for documents in self._drain(submitted):
+                for document in documents:
+                    record = document.record()
+                    self._count(record)
+                    yield record
+        finally:
+            # Also reached when the consumer stops early, e.g. a client that disconnected
+            self.stopped.set()
+            self.finished = time.perf_counter()
+
+    def summary(self):
+        seconds = (self.finished or time.perf_counter()) - self.started if self.started else 0.0
+        return {**self.counters, 'seconds': round(seconds, 3),
+                'docs_per_second': round(self.counters['documents'] / seconds, 3) if seconds else 0.0}
+
+    def _count(self, record):
+        self.counters['documents'] += 1
+        if 'error' in record:
+            self.counters['failed'] += 1
+        self.counters['verified'] += len(record.get('results', ()))
+
+    def _batches(self):
+        batch = []
+        for index, item in enumerate(self.items):
+            batch.append(Document(index, item))
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _drain(self, stage_queue):
+        while not self.stopped.is_set():
+            try:
+                batch = stage_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if batch is _DONE:
+                return
+            yield batch
+
+    def _put(self, stage_queue, batch):
+        # Wait for room downstream, unless the run was abandoned
+        while not self.stopped.is_set():
+            try:
+                stage_queue.put(batch, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run_stage(self, work, batches, output):
+        try:
+            for documents in batches:
+                if self.stopped.is_set():
+                    return
+                pending = [document for document in documents if document.error is None]
+                if pending:
+                    try:
+                        work(pending)
+                    except Exception as e:
+                        logger.exception("Batch stage %s failed", work.__name__.lstrip('_'))
+                        for document in pending:
+                            document.error = (500, str(e))
+                if not self._put(output, documents):
+                    return
+        except Exception as e:
+            # The input itself failed (e.g. a read error): end the run with what was read so far
+            logger.exception("Reading batch input failed: %s", e)
+        self._put(output, _DONE)
+
+    def _load(self, documents):
+        # Fetch every URL of the batch on the fetch pool, then split all texts in one nlp.pipe
+        fetches = {}
+        for document in documents:
+            item = document.item
+            if not isinstance(item, dict) or not (item.get('url') or item.get('text')):
+                document.error = (400, 'No URL or text provided.')
+            elif item.get('url'):
+                fetches[document] = submit(retrieve_post_text, item['url'])
+
+        texts = {}
+        for document in documents:
+            if document.error is not None:
+                continue
+            if document in fetches:
+                try:
+                    text = fetches[document].result()
+                except Exception as e:
+                    logger.warning("Error retrieving %s: %s", document.item['url'], e)
+                    text = None
+                if not text:
+                    document.error = (400, 'Unable to retrieve text from the provided URL.')
+                    continue
+            else:
+                text = document.item['text']
+            texts[document] = text
+
+        with timed('preprocess'):
+            sentence_lists = split_many([preprocess_text(text) for text in texts.values()])
+        for document, sentences in zip(texts, sentence_lists):
+            document.sentences = sentences
+
+    def _detect(self, documents):
+        claim_lists = self.fact_checker.detect_claims_many([document.sentences for document in documents])
+        for document, claims in zip(documents, claim_lists):
+            document.claims = claims
+            self.counters['claims'] += len(claims)
+
+    def _verify(self, documents):
+        # One evidence plan for the whole batch: pages found for claims of several documents are fetched once
+        claims = [claim for document in documents for claim in document.claims]
+        futures = list(self.fact_checker.submit_claims(claims))
+        offset = 0
+        for document in documents:
+            document.futures = futures[offset:offset + len(document.claims)]
+            offset += len(document.claims)
@@ -0,0 +1,70 @@
+# backend/batch_analyze.py
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+# Adjust the Python path to include the backend directory
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(backend_dir)
+
+from batch import BatchRun, parse_item
+from pipeline import FactChecker
+from models.registry import build_registry
+from config import BULK_BATCH_DOCUMENTS, BULK_QUEUE_BATCHES, CLAIM_WORKERS, VERDICT_CACHE_ENABLED, LOG_LEVEL
+
+def read_items(path):
+    """
+    Yields the items of an NDJSON file or a file of texts/URLs, one per line ('-' reads stdin).
+    """
+    f = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for line in f:
+            item = parse_item(line)
+            if item is not None:
+                yield item
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Fact-check a file of documents through the batched pipeline.")
+    parser.add_argument('input', help="NDJSON ({\"text\"} or {\"url\"}, optional \"id\") or one text/URL per line; '-' for stdin.")
+    parser.add_argument('--output', default=os.path.join(backend_dir, 'data', 'batch_results.jsonl'),
+                        help="Results file, one JSON line per document in input order.")
+    parser.add_argument('--batch-size', type=int, default=BULK_BATCH_DOCUMENTS, help="Documents per stage batch.")
+    parser.add_argument('--queue-batches', type=int, default=BULK_QUEUE_BATCHES,
+                        help="Batches buffered between two stages.")
+    parser.add_argument('--claim-workers', type=int, default=CLAIM_WORKERS * 4,
+                        help="Claims verified concurrently across documents.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    model_registry = build_registry().start()
+    handles = {name: model_registry.handle(name) for name in
+               ('claim_detector', 'claim_verifier', 'similarity_calculator', 'relevance_filter',
+                'multi_hop_reasoner', 'qa_model', 'retriever')}
+    verdict_store = model_registry.handle('verdict_store') if VERDICT_CACHE_ENABLED else None
+    fact_checker = FactChecker(handles['claim_detector'], handles['claim_verifier'], handles['similarity_calculator'],
+                               handles['relevance_filter'], handles['multi_hop_reasoner'], handles['qa_model'],
+                               max_workers=args.claim_workers, verdict_store=verdict_store,
+                               retriever=handles['retriever'])
+
+    run = BatchRun(fact_checker, read_items(args.input), batch_size=args.batch_size, queue_batches=args.queue_batches)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as results_file:
+        for record in run:
+            results_file.write(json.dumps(record) + '\n')
+            if record['index'] % 100 == 99:
+                summary = run.summary()
+                print(f"{summary['documents']} documents, {summary['docs_per_second']:.2f} docs/s", flush=True)
+
+    summary = run.summary()
+    print(f"\nProcessed {summary['documents']} documents ({summary['failed']} failed, {summary['claims']} claims, "
+          f"{summary['verified']} verified) in {summary['seconds']:.1f}s: {summary['docs_per_second']:.2f} docs/s")
+
+if __name__ == "__main__":
+    main()
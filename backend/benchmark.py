@@ -0,0 +1,391 @@
+# backend/benchmark.py
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Adjust the Python path to include the backend directory
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(backend_dir)
+
+from benchmarks.stub_server import StubServer, FIXTURES_DIR
+
+SUITES = ('models', 'utils', 'e2e')
+BATCH_SIZES = (1, 8, 32)
+INPUT_WORDS = (16, 128)
+DOCUMENT_WORDS = (128, 1024)
+CONCURRENCY = (1, 4, 8)
+
+def load_fixtures():
+    with open(os.path.join(FIXTURES_DIR, 'claims.json')) as f:
+        fixtures = json.load(f)
+    pages = {}
+    pages_dir = os.path.join(FIXTURES_DIR, 'pages')
+    for name in sorted(os.listdir(pages_dir)):
+        with open(os.path.join(pages_dir, name), 'rb') as f:
+            pages[name] = f.read()
+    fixtures['pages'] = pages
+    return fixtures
+
+class TextFactory:
+    """
+    Deterministic inputs of a given length built from the fixture vocabulary. Every
+    seed gives a different text, so the embedding and verdict caches never hit.
+    """
+    def __init__(self, fixtures):
+        self.claims = fixtures['claims']
+        self.words = ' '.join(fixtures['documents']).split()
+
+    def text(self, words, seed):
+        start = (seed * 7) % len(self.words)
+        body = [self.words[(start + i) % len(self.words)] for i in range(words - 1)]
+        return f"#{seed} " + ' '.join(body)
+
+    def texts(self, count, words, seed):
+        return [self.text(words, seed * count + i) for i in range(count)]
+
+    def claim(self, seed):
+        return f"{self.claims[seed % len(self.claims)]} ({seed})"
+
+def summarize(latencies, items, elapsed):
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'iterations': len(latencies),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'mean_ms': float(latencies_ms.mean()),
+        'throughput': items / elapsed if elapsed else 0.0,  # Items per second
+    }
+
+def measure(make_input, fn, items, iterations, warmup):
+    """
+    Times fn(make_input(i)) over iterations calls after warmup untimed ones.
+    Inputs are built outside the timed region.
+    """
+    for i in range(warmup):
+        fn(make_input(i))
+    latencies = []
+    for i in range(warmup, warmup + iterations):
+        args = make_input(i)
+        started = time.perf_counter()
+        fn(args)
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies, items * iterations, sum(latencies))
+
+def case_key(name, params):
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+def _unwrap(model):
+    # Measure the model class itself, not the cross-request batching queue in front of it
+    from models.serving import BatchedModel
+    return model.model if isinstance(model, BatchedModel) else model
+
+def model_cases(registry, factory):
+    detector = _unwrap(registry.get('claim_detector'))
+    verifier = _unwrap(registry.get('claim_verifier'))
+    qa_model = _unwrap(registry.get('qa_model'))
+    reasoner = _unwrap(registry.get('multi_hop_reasoner'))
+    embeddings = registry.get('similarity_calculator').embeddings
+
+    def pairs(batch, words):
+        return lambda i: [(factory.claim(i * batch + j), factory.text(words, i * batch + j)) for j in range(batch)]
+
+    cases = []
+    for batch in BATCH_SIZES:
+        for words in INPUT_WORDS:
+            params = {'batch': batch, 'words': words}
+            cases.append(('models.claim_detection', params,
+                          lambda i, b=batch, w=words: factory.texts(b, w, i), detector.predict_batch, batch))
+            cases.append(('models.claim_verification', params, pairs(batch, words), verifier.verify_batch, batch))
+            cases.append(('models.question_answering', params, pairs(batch, words), qa_model.answer_batch, batch))
+            cases.append(('models.embeddings', params,
+                          lambda i, b=batch, w=words: factory.texts(b, w, i), embeddings.encode, batch))
+    # Generation is far slower per input, so it gets smaller batches
+    for mode in ('legacy', 'packed'):
+        for batch in (1, 4):
+            for words in INPUT_WORDS:
+                make_input = (lambda i, b=batch, w=words:
+                              [(factory.claim(i * b + j), factory.texts(9, w, i * b + j)) for j in range(b)])
+                cases.append(('models.multi_hop_reasoning', {'mode': mode, 'batch': batch, 'words': words},
+                              make_input, lambda items, m=mode: reasoner.reason_batch(items, mode=m), batch))
+    return cases
+
+def multi_hop_quality(registry, fixtures):
+    """
+    Runs both multi-hop modes on the fixture claims over their relevance-ordered fixture
+    pages, and reports their latency and how often the packed mode agrees with the legacy
+    one, on the answer itself and on the verdict the claim verifier draws from it.
+    """
+    from utils.html_extraction import iter_paragraphs
+
+    reasoner = _unwrap(registry.get('multi_hop_reasoner'))
+    verifier = _unwrap(registry.get('claim_verifier'))
+    relevance_filter = registry.get('relevance_filter')
+    similarity_calculator = registry.get('similarity_calculator')
+    documents = [relevance_filter.chunk_paragraphs(iter_paragraphs(iter([page]))) for page in fixtures['pages'].values()]
+
+    latencies = {'legacy': [], 'packed': []}
+    answers = {'legacy': [], 'packed': []}
+    for claim in fixtures['claims']:
+        # Evidences ordered as the pipeline orders them: most similar page first
+        texts = relevance_filter.select_passages([claim], documents, top_k=9)[0]
+        similarities = similarity_calculator.compute_similarities(claim, texts)
+        evidences = [text for _, text in sorted(zip(similarities, texts), reverse=True)]
+        for mode in ('legacy', 'packed'):
+            started = time.perf_counter()
+            answers[mode].append(reasoner.reason_batch([(claim, evidences)], mode=mode)[0])
+            latencies[mode].append(time.perf_counter() - started)
+
+    verdicts = {mode: [label for label, _ in verifier.verify_batch(list(zip(fixtures['claims'], answers[mode])))]
+                for mode in answers}
+    pairs = list(zip(answers['legacy'], answers['packed']))
+    quality = {
+        'items': len(pairs),
+        'legacy_p50_ms': float(np.percentile(latencies['legacy'], 50) * 1000),
+        'packed_p50_ms': float(np.percentile(latencies['packed'], 50) * 1000),
+        'answer_agreement': sum(a.strip().lower() == b.strip().lower() for a, b in pairs) / len(pairs),
+        'verdict_agreement': sum(a == b for a, b in zip(verdicts['legacy'], verdicts['packed'])) / len(pairs),
+    }
+    print(f"{'multi_hop packed vs legacy':<60} p50 {quality['packed_p50_ms']:.0f} vs {quality['legacy_p50_ms']:.0f} ms  "
+          f"answers {quality['answer_agreement']:.2f}  verdicts {quality['verdict_agreement']:.2f}")
+    return quality
+
+def util_cases(registry, factory, fixtures, stub, scratch_dir):
+    from utils.text_preprocessing import preprocess_text, split_into_sentences
+    from utils.html_extraction import iter_paragraphs
+    from utils.embeddings import top_k_indices
+    from utils.local_index import tokenize
+    from utils.cache import DiskCache
+    from utils.text_retrieval import iter_post_paragraphs
+    from utils.evidence_retrieval import search_urls
+    from utils.knowledge_graph import query_wikidata
+
+    registry.get('nlp')
+    relevance_filter = registry.get('relevance_filter')
+    cache = DiskCache(path=os.path.join(scratch_dir, 'bench-cache.sqlite3'), ttl=3600)
+    pages = list(fixtures['pages'].values())
+    page_names = list(fixtures['pages'])
+
+    def split(text):
+        return split_into_sentences(preprocess_text(text))
+
+    def page_chunks(i, copies):
+        # Longer pages repeat the fixture's body, fed in network-sized 16 KiB chunks
+        page = pages[i % len(pages)]
+        head, rest = page.split(b'<body>', 1)
+        body, tail = rest.rsplit(b'</body>', 1)
+        page = head + b'<body>' + body * copies + b'</body>' + tail
+        return [page[start:start + 16384] for start in range(0, len(page), 16384)]
+
+    def extract(chunks):
+        return list(iter_paragraphs(iter(chunks)))
+
+    def cache_roundtrip(args):
+        key, value = args
+        cache.set('bench', key, value)
+        cache.get('bench', key)
+
+    cases = []
+    for words in DOCUMENT_WORDS:
+        params = {'words': words}
+        cases.append(('utils.text_preprocessing', params, lambda i, w=words: factory.text(w, i), split, 1))
+        cases.append(('utils.relevance_filtering', params,
+                      lambda i, w=words: (factory.claim(i), factory.text(w, i)),
+                      lambda args: relevance_filter.extract_relevant_passages(*args), 1))
+        cases.append(('utils.tokenize', params, lambda i, w=words: factory.text(w, i), tokenize, 1))
+        cases.append(('utils.cache', params, lambda i, w=words: (f"key-{i}", {'text': factory.text(w, i)}),
+                      cache_roundtrip, 1))
+    for copies in (1, 8):
+        cases.append(('utils.html_extraction', {'page_copies': copies},
+                      lambda i, c=copies: page_chunks(i, c), extract, 1))
+    for size in (1000, 100000):
+        rng = np.random.default_rng(0)
+        scores = rng.random(size, dtype=np.float32)
+        cases.append(('utils.top_k_indices', {'scores': size}, lambda i, s=scores: s,
+                      lambda s: top_k_indices(s, 9), 1))
+    cases.append(('utils.fetch', {}, lambda i: stub.page_url(page_names[i % len(page_names)]),
+                  lambda url: list(iter_post_paragraphs(url)), 1))
+    cases.append(('utils.search', {}, factory.claim, search_urls, 1))
+    cases.append(('utils.knowledge_graph', {}, factory.claim, query_wikidata, 1))
+    return cases
+
+def run_cases(cases, iterations, warmup, results):
+    for name, params, make_input, fn, items in cases:
+        key = case_key(name, params)
+        results[key] = {'name': name, 'params': params, **measure(make_input, fn, items, iterations, warmup)}
+        print(f"{key:<60} p50 {results[key]['p50_ms']:9.2f} ms  p95 {results[key]['p95_ms']:9.2f} ms  "
+              f"{results[key]['throughput']:9.1f} items/s")
+
+def run_e2e(server_app, documents, requests_per_client, results):
+    """
+    Serves the app on a local port and sends POST /analyze from N concurrent clients.
+    """
+    import requests
+    from werkzeug.serving import make_server
+
+    http_server = make_server('127.0.0.1', 0, server_app, threaded=True)
+    threading.Thread(target=http_server.serve_forever, name='benchmark-app', daemon=True).start()
+    url = f"http://127.0.0.1:{http_server.server_port}/analyze"
+    try:
+        requests.post(url, json={'text': documents[0]}).raise_for_status()  # Warm up
+        for clients in CONCURRENCY:
+            def client(index):
+                session = requests.Session()
+                latencies = []
+                for n in range(requests_per_client):
+                    started = time.perf_counter()
+                    session.post(url, json={'text': documents[(index + n) % len(documents)]}).raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                return latencies
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as executor:
+                latencies = [latency for client_latencies in executor.map(client, range(clients))
+                             for latency in client_latencies]
+            elapsed = time.perf_counter() - started
+            key = case_key('e2e.analyze', {'clients': clients})
+            results[key] = {'name': 'e2e.analyze', 'params': {'clients': clients},
+                            **summarize(latencies, len(latencies), elapsed)}
+            print(f"{key:<60} p50 {results[key]['p50_ms']:9.2f} ms  p95 {results[key]['p95_ms']:9.2f} ms  "
+                  f"{results[key]['throughput']:9.2f} requests/s")
+    finally:
+        http_server.shutdown()
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=backend_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(suites, iterations, warmup, requests_per_client, stub_latency_ms):
+    stub = StubServer(latency_ms=stub_latency_ms).start()
+    scratch_dir = tempfile.mkdtemp(prefix='veriboard-bench-')
+    # Point the backend at the stub server and a throwaway cache before config is imported.
+    # With a zero TTL every search, page and Wikidata lookup goes to the stub. No job
+    # workers: importing app would otherwise fork them while suites are being timed.
+    os.environ.update(stub.env())
+    os.environ.update({
+        'CACHE_PATH': os.path.join(scratch_dir, 'cache.sqlite3'),
+        'CACHE_TTL': '0',
+        'VERDICT_CACHE_ENABLED': '0',
+        'EVIDENCE_RETRIEVER': 'web',
+        'DEFERRED_MODELS': '',
+        'JOB_WORKERS': '0',
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'WARNING'),
+    })
+
+    import torch
+    import app as server
+    from models.backends import get_device
+
+    server.model_registry.wait()
+    fixtures = load_fixtures()
+    factory = TextFactory(fixtures)
+    results = {}
+    quality = {}
+    try:
+        if 'models' in suites:
+            run_cases(model_cases(server.model_registry, factory), iterations, warmup, results)
+            quality['multi_hop'] = multi_hop_quality(server.model_registry, fixtures)
+        if 'utils' in suites:
+            run_cases(util_cases(server.model_registry, factory, fixtures, stub, scratch_dir), iterations, warmup, results)
+        if 'e2e' in suites:
+            run_e2e(server.app, fixtures['documents'], requests_per_client, results)
+    finally:
+        stub.stop()
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'device': str(get_device()),
+            'torch_threads': torch.get_num_threads(),
+            'iterations': iterations,
+            'warmup': warmup,
+            'requests_per_client': requests_per_client,
+            'stub_latency_ms': stub_latency_ms,
+        },
+        'results': results,
+        'quality': quality,
+    }
+
+def compare(baseline, current, threshold):
+    """
+    Prints every benchmark present in both runs and returns the keys of those whose
+    p50 latency rose, or whose throughput fell, by more than threshold.
+    """
+    regressions = []
+    print(f"{'benchmark':<60} {'p50 base':>10} {'p50 now':>10} {'Δp50':>8} {'Δthroughput':>12}")
+    for key, base in baseline['results'].items():
+        now = current['results'].get(key)
+        if now is None:
+            continue
+        latency_change = now['p50_ms'] / base['p50_ms'] - 1 if base['p50_ms'] else 0.0
+        throughput_change = now['throughput'] / base['throughput'] - 1 if base['throughput'] else 0.0
+        regressed = latency_change > threshold or throughput_change < -threshold
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<60} {base['p50_ms']:10.2f} {now['p50_ms']:10.2f} {latency_change:+8.1%} "
+              f"{throughput_change:+12.1%}{'  REGRESSION' if regressed else ''}")
+    missing = sorted(set(baseline['results']) - set(current['results']))
+    if missing:
+        print(f"Not in the current run: {', '.join(missing)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage offline against recorded fixtures.")
+    parser.add_argument('--suites', default=','.join(SUITES), help="Comma-separated subset of: " + ', '.join(SUITES))
+    parser.add_argument('--output', default=os.path.join(backend_dir, 'data', 'benchmarks', 'latest.json'),
+                        help="Where to write the JSON results")
+    parser.add_argument('--iterations', type=int, default=20, help="Timed calls per benchmark")
+    parser.add_argument('--warmup', type=int, default=3, help="Untimed calls before each benchmark")
+    parser.add_argument('--requests-per-client', type=int, default=5, help="Requests each end-to-end client sends")
+    parser.add_argument('--stub-latency-ms', type=float, default=20,
+                        help="Delay the stub server adds to every response, standing in for the network")
+    parser.add_argument('--baseline', help="Stored results to compare against; exits with 1 on regressions")
+    parser.add_argument('--compare', help="Compare these stored results with --baseline instead of running")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Relative p50 latency increase or throughput drop counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        if not args.baseline:
+            parser.error("--compare requires --baseline")
+        with open(args.compare) as f:
+            current = json.load(f)
+    else:
+        suites = [suite.strip() for suite in args.suites.split(',') if suite.strip()]
+        unknown = set(suites) - set(SUITES)
+        if unknown:
+            parser.error(f"Unknown suites: {', '.join(sorted(unknown))}")
+        current = run_benchmarks(suites, args.iterations, args.warmup, args.requests_per_client, args.stub_latency_ms)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+        print("No regressions.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# backend/benchmarks/stub_server.py
+
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+VALUES_NAME = re.compile(r'"((?:[^"\\]|\\.)*)"@en')
+
+def _match(fixtures, text):
+    # The first keyword found in the text picks the fixture, 'default' otherwise
+    text = text.lower()
+    for keyword, value in fixtures.items():
+        if keyword != 'default' and keyword in text:
+            return value
+    return fixtures['default']
+
+def _match_values(fixtures, query):
+    # Entity queries bind every name of their VALUES clause to the items of the fixture it picks
+    values = query[query.index('VALUES'):]
+    values = values[:values.index('}')]
+    bindings = []
+    for name in VALUES_NAME.findall(values):
+        for binding in _match(fixtures, name)['results']['bindings']:
+            bindings.append({'name': {'type': 'literal', 'xml:lang': 'en', 'value': name}, **binding})
+    return {'head': {'vars': ['name', 'item', 'itemLabel', 'itemDescription']}, 'results': {'bindings': bindings}}
+
+class StubServer:
+    """
+    Serves the recorded fixtures in place of Google Custom Search, the evidence
+    pages and the Wikidata SPARQL endpoint, so benchmarks need no network.
+    Every response is delayed by latency_ms to stand in for a remote round trip.
+    """
+    def __init__(self, fixtures_dir=FIXTURES_DIR, latency_ms=0, host='127.0.0.1', port=0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency_ms / 1000.0
+        with open(os.path.join(fixtures_dir, 'search.json')) as f:
+            self.search = json.load(f)
+        with open(os.path.join(fixtures_dir, 'sparql.json')) as f:
+            self.sparql = json.load(f)
+        self.pages = {}
+        pages_dir = os.path.join(fixtures_dir, 'pages')
+        for name in os.listdir(pages_dir):
+            with open(os.path.join(pages_dir, name), 'rb') as f:
+                self.pages[name] = f.read()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='stub-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def env(self):
+        """
+        Environment variables pointing the backend at this server. They must be set
+        before config is imported.
+        """
+        return {
+            'GOOGLE_API_KEY': 'benchmark',
+            'GOOGLE_CSE_ID': 'benchmark',
+            'SEARCH_API_ENDPOINT': self.base_url + '/',
+            'WIKIDATA_ENDPOINT': self.base_url + '/sparql',
+            'WIKIDATA_RATE': '1000',
+            'WIKIDATA_BURST': '1000',
+        }
+
+    def page_url(self, name):
+        return f"{self.base_url}/pages/{name}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                parsed = urlparse(self.path)
+                params = parse_qs(parsed.query)
+                if parsed.path.endswith('/customsearch/v1'):
+                    pages = _match(stub.search, params.get('q', [''])[0])
+                    num = int(params.get('num', ['10'])[0])
+                    items = [{'link': stub.page_url(name), 'title': name} for name in pages[:num]]
+                    self._send(200, 'application/json', json.dumps({'items': items}).encode())
+                elif parsed.path.startswith('/pages/'):
+                    body = stub.pages.get(parsed.path[len('/pages/'):])
+                    if body is None:
+                        self._send(404, 'text/plain', b'Not found')
+                    else:
+                        self._send(200, 'text/html; charset=utf-8', body)
+                elif parsed.path == '/sparql':
+                    query = params.get('query', [''])[0]
+                    results = _match_values(stub.sparql, query) if 'VALUES' in query else _match(stub.sparql, query)
+                    self._send(200, 'application/sparql-results+json', json.dumps(results).encode())
+                else:
+                    self._send(404, 'text/plain', b'Not found')
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,73 @@
+# backend/build_local_index.py
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Adjust the Python path to include the backend directory
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(backend_dir)
+
+from config import LOCAL_INDEX_DIR
+from utils.cache import disk_cache
+from utils.local_index import LocalIndex
+from utils.similarity import SimilarityCalculator
+
+def iter_jsonl_documents(path):
+    """
+    Reads {"url", "text"} lines (optionally with "title"), e.g. a Wikipedia dump
+    converted with WikiExtractor --json. Paragraphs are separated by blank lines or newlines.
+    """
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            document = json.loads(line)
+            paragraphs = [paragraph.strip() for paragraph in document['text'].split('\n') if paragraph.strip()]
+            if document.get('title'):
+                paragraphs.insert(0, document['title'])
+            yield document['url'], paragraphs
+
+def iter_cached_pages():
+    # Pages fetched by earlier runs, as stored by text_retrieval
+    for page in disk_cache.iter_values('page'):
+        if page.get('url') and page.get('text'):
+            yield page['url'], page.get('paragraphs') or [page['text']]
+
+def index_in_batches(index, documents, batch_size):
+    batch = []
+    added = 0
+    started = time.perf_counter()
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            added += index.add_documents(batch)
+            batch = []
+            print(f"Indexed {added} chunks ({added / (time.perf_counter() - started):.1f} chunks/s)")
+    if batch:
+        added += index.add_documents(batch)
+    return added
+
+def main():
+    parser = argparse.ArgumentParser(description="Add documents to the offline evidence index.")
+    parser.add_argument('--jsonl', nargs='*', default=[], help="JSON-lines corpus files with url and text fields.")
+    parser.add_argument('--from-cache', action='store_true', help="Index the pages in the fetch cache.")
+    parser.add_argument('--index-dir', default=LOCAL_INDEX_DIR)
+    parser.add_argument('--batch-size', type=int, default=256, help="Documents encoded per batch.")
+    args = parser.parse_args()
+
+    if not args.jsonl and not args.from_cache:
+        parser.error("Nothing to index: pass --jsonl files and/or --from-cache.")
+
+    index = LocalIndex(SimilarityCalculator().embeddings, directory=args.index_dir)
+    added = 0
+    for path in args.jsonl:
+        print(f"Indexing {path}")
+        added += index_in_batches(index, iter_jsonl_documents(path), args.batch_size)
+    if args.from_cache:
+        print("Indexing cached pages")
+        added += index_in_batches(index, iter_cached_pages(), args.batch_size)
+    print(f"Added {added} chunks; the index now holds {len(index)} chunks.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# backend/check_backend_parity.py
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# Adjust the Python path to include the backend directory
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(backend_dir)
+
+from models.ensemble_claim_detection_model import EnsembleClaimDetectionModel
+from models.advanced_claim_verification_model import AdvancedClaimVerificationModel
+from models.question_answering_model import QuestionAnsweringModel
+from models.multi_hop_reasoning_model import MultiHopReasoningModel
+from utils.liar import load_liar_dataset
+
+def held_out_statements(dataset_path, size):
+    # Take the statements from the end of the file, away from anything used for tuning
+    liar_df = load_liar_dataset(dataset_path)
+    return [str(statement) for statement in liar_df['statement'].tail(size)]
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    outputs = fn(*args)
+    return outputs, time.perf_counter() - started
+
+def compare_stage(name, baseline_fn, candidate_fn, inputs, max_confidence_delta):
+    baseline, baseline_seconds = timed(baseline_fn, inputs)
+    candidate, candidate_seconds = timed(candidate_fn, inputs)
+    baseline_labels = [output[:-1] for output in baseline]
+    candidate_labels = [output[:-1] for output in candidate]
+    agreement = np.mean([b == c for b, c in zip(baseline_labels, candidate_labels)])
+    deltas = np.abs(np.array([b[-1] for b in baseline]) - np.array([c[-1] for c in candidate]))
+    passed = agreement == 1.0 and deltas.max() <= max_confidence_delta
+    print(f"{name:<20} agreement {agreement:.4f}  max |Δconf| {deltas.max():.4f}  "
+          f"speedup {baseline_seconds / candidate_seconds:.2f}x  {'OK' if passed else 'MISMATCH'}")
+    return passed
+
+def compare_generation(name, baseline_fn, candidate_fn, inputs):
+    baseline, baseline_seconds = timed(baseline_fn, inputs)
+    candidate, candidate_seconds = timed(candidate_fn, inputs)
+    agreement = np.mean([b.strip().lower() == c.strip().lower() for b, c in zip(baseline, candidate)])
+    print(f"{name:<20} exact match {agreement:.4f}  speedup {baseline_seconds / candidate_seconds:.2f}x")
+    return agreement
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare an inference backend against the fp32 PyTorch baseline.")
+    parser.add_argument('backend', choices=['quantized', 'onnx'])
+    parser.add_argument('--dataset', default=os.path.join(backend_dir, 'data', 'train.tsv'))
+    parser.add_argument('--size', type=int, default=200, help="Number of held-out statements.")
+    parser.add_argument('--max-confidence-delta', type=float, default=0.05)
+    parser.add_argument('--min-generation-match', type=float, default=0.9)
+    parser.add_argument('--skip-multi-hop', action='store_true', help="Skip the slow T5 comparison.")
+    args = parser.parse_args()
+
+    statements = held_out_statements(args.dataset, args.size)
+    # Pair each statement with its neighbour so NLI and QA see realistic lengths
+    pairs = list(zip(statements, statements[1:] + statements[:1]))
+    contexts = [' '.join(statements[i:i + 3]) for i in range(len(statements))]
+
+    results = []
+    detector_fp32 = EnsembleClaimDetectionModel(backend='pytorch')
+    detector = EnsembleClaimDetectionModel(backend=args.backend)
+    results.append(compare_stage('claim_detection', detector_fp32.predict_batch, detector.predict_batch,
+                                 statements, args.max_confidence_delta))
+    del detector_fp32, detector
+
+    verifier_fp32 = AdvancedClaimVerificationModel(backend='pytorch')
+    verifier = AdvancedClaimVerificationModel(backend=args.backend)
+    results.append(compare_stage('claim_verification', verifier_fp32.verify_batch, verifier.verify_batch,
+                                 pairs, args.max_confidence_delta))
+    del verifier_fp32, verifier
+
+    qa_fp32 = QuestionAnsweringModel(backend='pytorch')
+    qa = QuestionAnsweringModel(backend=args.backend)
+    qa_pairs = list(zip(statements, contexts))
+    results.append(compare_stage('question_answering', qa_fp32.answer_batch, qa.answer_batch,
+                                 qa_pairs, args.max_confidence_delta))
+    del qa_fp32, qa
+
+    if not args.skip_multi_hop:
+        reasoner_fp32 = MultiHopReasoningModel(backend='pytorch')
+        reasoner = MultiHopReasoningModel(backend=args.backend)
+        items = [(statement, [context]) for statement, context in zip(statements, contexts)][:50]
+        match = compare_generation('multi_hop_reasoning', reasoner_fp32.reason_batch, reasoner.reason_batch, items)
+        results.append(match >= args.min_generation_match)
+
+    if not all(results):
+        print("Backend parity check failed.")
+        sys.exit(1)
+    print("Backend parity check passed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# backend/check_segmenter_parity.py
+
+import argparse
+import os
+import sys
+import time
+
+# Adjust the Python path to include the backend directory
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(backend_dir)
+
+from utils.text_preprocessing import get_nlp, split_many, preprocess_text
+from utils.liar import load_liar_dataset
+
+def held_out_documents(dataset_path, size, sentences_per_document):
+    # Join consecutive statements into multi-sentence posts, taken from the end of the file
+    liar_df = load_liar_dataset(dataset_path)
+    statements = [preprocess_text(str(statement)) for statement in liar_df['statement'].tail(size * sentences_per_document)]
+    return [' '.join(statements[i:i + sentences_per_document]) for i in range(0, len(statements), sentences_per_document)]
+
+def boundaries(sentences):
+    # Character offsets where sentences end, ignoring whitespace between them
+    offsets = set()
+    position = 0
+    for sentence in sentences:
+        position += len(''.join(sentence.split()))
+        offsets.add(position)
+    return offsets
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a fast sentence segmenter against the full spaCy pipeline.")
+    parser.add_argument('mode', choices=['parser', 'senter', 'sentencizer'])
+    parser.add_argument('--dataset', default=os.path.join(backend_dir, 'data', 'train.tsv'))
+    parser.add_argument('--size', type=int, default=500, help="Number of documents.")
+    parser.add_argument('--sentences-per-document', type=int, default=5)
+    parser.add_argument('--processes', type=int, default=1, help="nlp.pipe worker processes for the fast segmenter.")
+    parser.add_argument('--min-document-match', type=float, default=0.99)
+    args = parser.parse_args()
+
+    documents = held_out_documents(args.dataset, args.size, args.sentences_per_document)
+
+    full_nlp = get_nlp()
+    started = time.perf_counter()
+    baseline = [[sent.text.strip() for sent in full_nlp(document).sents] for document in documents]
+    baseline_seconds = time.perf_counter() - started
+
+    split_many(documents[:1], mode=args.mode)  # Load the model outside the timed region
+    started = time.perf_counter()
+    candidate = split_many(documents, mode=args.mode, n_process=args.processes)
+    candidate_seconds = time.perf_counter() - started
+
+    document_match = sum(b == c for b, c in zip(baseline, candidate)) / len(documents)
+    true_positives = predicted = expected = 0
+    for b, c in zip(baseline, candidate):
+        expected_boundaries, predicted_boundaries = boundaries(b), boundaries(c)
+        true_positives += len(expected_boundaries & predicted_boundaries)
+        expected += len(expected_boundaries)
+        predicted += len(predicted_boundaries)
+    precision = true_positives / predicted if predicted else 1.0
+    recall = true_positives / expected if expected else 1.0
+
+    print(f"{args.mode:<12} identical documents {document_match:.4f}  boundary precision {precision:.4f}  "
+          f"recall {recall:.4f}  speedup {baseline_seconds / candidate_seconds:.2f}x")
+    if document_match < args.min_document_match:
+        print("MISMATCH")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == '__main__':
+    main()
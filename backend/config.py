@@ -7,3 +7,102 @@ load_dotenv()
 # Google Custom Search API Credentials
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 SEARCH_ENGINE_ID = os.getenv('GOOGLE_CSE_ID')
+SEARCH_API_ENDPOINT = os.getenv('SEARCH_API_ENDPOINT')  # Overrides the Custom Search host, e.g. for the benchmark stub server
+
+# HTTP fetching of evidence pages
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '16'))  # Keep-alive connections and fetch threads
+HTTP_MAX_PER_HOST = int(os.getenv('HTTP_MAX_PER_HOST', '2'))  # Concurrent requests to the same host
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '5'))  # Seconds allowed for a single URL
+HTTP_DEADLINE = float(os.getenv('HTTP_DEADLINE', '10'))  # Seconds allowed for a whole batch of URLs
+HTTP_MAX_BYTES = int(os.getenv('HTTP_MAX_BYTES', str(2 * 1024 * 1024)))  # Body size cap per page
+HTTP_PLAN_MAX_FETCHES = int(os.getenv('HTTP_PLAN_MAX_FETCHES', '8'))  # Pages one request fetches at a time
+
+# Wikidata SPARQL endpoint
+WIKIDATA_ENDPOINT = os.getenv('WIKIDATA_ENDPOINT', 'https://query.wikidata.org/sparql')
+WIKIDATA_RATE = float(os.getenv('WIKIDATA_RATE', '1'))  # Sustained queries per second
+WIKIDATA_BURST = int(os.getenv('WIKIDATA_BURST', '5'))  # Queries allowed back to back before waiting
+WIKIDATA_MAX_CONCURRENCY = int(os.getenv('WIKIDATA_MAX_CONCURRENCY', '5'))  # Parallel queries in flight
+WIKIDATA_TIMEOUT = float(os.getenv('WIKIDATA_TIMEOUT', '10'))
+
+# Knowledge graph evidence: named entities of the claims resolved to Wikidata items by label
+KG_ITEMS_PER_ENTITY = int(os.getenv('KG_ITEMS_PER_ENTITY', '2'))  # Best-known items kept per entity name
+KG_MAX_RESULTS = int(os.getenv('KG_MAX_RESULTS', '5'))  # KG evidences per claim
+KG_MAX_VALUES = int(os.getenv('KG_MAX_VALUES', '50'))  # Entity names per SPARQL VALUES query
+
+# Persistent cache for search results, fetched pages and Wikidata results
+CACHE_PATH = os.getenv('CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cache.sqlite3'))
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+CACHE_TTL = float(os.getenv('CACHE_TTL', str(7 * 24 * 3600)))  # Seconds before an entry must be revalidated
+CACHE_OFFLINE = os.getenv('CACHE_OFFLINE', '0') == '1'  # Serve only from the cache, never touch the network
+
+# Number of claims of a request verified concurrently
+CLAIM_WORKERS = int(os.getenv('CLAIM_WORKERS', '4'))
+
+# Background job queue for /jobs
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))  # Model-serving worker processes
+JOB_WORKER_MODE = os.getenv('JOB_WORKER_MODE', 'fork')  # 'fork' (copy-on-write processes) or 'thread'
+JOB_MAX_QUEUED = int(os.getenv('JOB_MAX_QUEUED', '64'))  # Jobs waiting beyond this are rejected
+JOB_THREADS_PER_WORKER = int(os.getenv('JOB_THREADS_PER_WORKER', str(max(1, (os.cpu_count() or 1) // max(1, JOB_WORKERS)))))
+JOB_RETENTION = int(os.getenv('JOB_RETENTION', '1000'))  # Finished jobs kept for GET /jobs/<id>
+JOB_TIMEOUT = float(os.getenv('JOB_TIMEOUT', '300'))  # Seconds a job may run before its worker is killed (0: no limit)
+
+# Cross-request micro-batching in front of the transformer models
+BATCHING_ENABLED = os.getenv('BATCHING_ENABLED', '1') == '1'
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '32'))
+BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', '10'))
+
+# Inference backend for the transformer models: 'pytorch', 'quantized' (dynamic int8) or 'onnx'
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'pytorch')
+ONNX_CACHE_DIR = os.getenv('ONNX_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'onnx'))
+
+# Multi-hop reasoning: 'packed' (relevance-ordered token budget, greedy decoding) or 'legacy'
+MULTI_HOP_MODE = os.getenv('MULTI_HOP_MODE', 'packed')
+MULTI_HOP_TOKEN_BUDGET = int(os.getenv('MULTI_HOP_TOKEN_BUDGET', '512'))  # Input tokens: question plus packed evidences
+MULTI_HOP_MAX_NEW_TOKENS = int(os.getenv('MULTI_HOP_MAX_NEW_TOKENS', '16'))  # Verdict-style answers are short
+MULTI_HOP_MIN_PASSAGE_TOKENS = int(os.getenv('MULTI_HOP_MIN_PASSAGE_TOKENS', '32'))  # Smallest cut passage worth keeping
+
+# Bulk analysis for /analyze/batch and batch_analyze.py
+BULK_BATCH_DOCUMENTS = int(os.getenv('BULK_BATCH_DOCUMENTS', '32'))  # Documents that go through each stage together
+BULK_QUEUE_BATCHES = int(os.getenv('BULK_QUEUE_BATCHES', '2'))  # Batches buffered between two stages
+BULK_MAX_DOCUMENTS = int(os.getenv('BULK_MAX_DOCUMENTS', '10000'))  # Items accepted by one /analyze/batch request
+
+# Models loaded on first use instead of at startup (comma-separated registry names)
+DEFERRED_MODELS = [name for name in os.getenv('DEFERRED_MODELS', 'multi_hop_reasoner').split(',') if name]
+
+# Early-exit verification cascade
+CASCADE_ENABLED = os.getenv('CASCADE_ENABLED', '1') == '1'
+CASCADE_FIRST_K = int(os.getenv('CASCADE_FIRST_K', '2'))  # Evidences verified before deciding to stop
+CASCADE_CONFIDENCE = float(os.getenv('CASCADE_CONFIDENCE', '0.9'))  # Average confidence needed to stop early
+
+# Verdict cache for near-duplicate claims
+VERDICT_CACHE_ENABLED = os.getenv('VERDICT_CACHE_ENABLED', '0') == '1'
+VERDICT_STORE_PATH = os.getenv('VERDICT_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'verdicts.sqlite3'))
+VERDICT_SIMILARITY_THRESHOLD = float(os.getenv('VERDICT_SIMILARITY_THRESHOLD', '0.92'))  # Cosine similarity for a cache hit
+VERDICT_TTL = float(os.getenv('VERDICT_TTL', str(3 * 24 * 3600)))
+VERDICT_NPROBE = int(os.getenv('VERDICT_NPROBE', '4'))  # Index lists searched per lookup
+VERDICT_PURGE_INTERVAL = float(os.getenv('VERDICT_PURGE_INTERVAL', '3600'))  # Seconds between deletions of expired verdicts
+
+# HTML extraction of evidence pages
+HTML_MAX_PARAGRAPHS = int(os.getenv('HTML_MAX_PARAGRAPHS', '400'))  # Stop reading a page after this many paragraphs
+HTML_MIN_PARAGRAPH_CHARS = int(os.getenv('HTML_MIN_PARAGRAPH_CHARS', '20'))
+
+# Sentence segmentation: 'parser' (same sentences as the full spaCy pipeline), 'senter' or 'sentencizer' (faster)
+SENTENCE_SEGMENTER = os.getenv('SENTENCE_SEGMENTER', 'parser')
+SEGMENTER_PROCESSES = int(os.getenv('SEGMENTER_PROCESSES', '1'))  # nlp.pipe worker processes for large batches
+SEGMENTER_BATCH_SIZE = int(os.getenv('SEGMENTER_BATCH_SIZE', '64'))
+SENTENCE_CACHE_SIZE = int(os.getenv('SENTENCE_CACHE_SIZE', '4096'))  # Split texts kept in memory
+
+# Passage chunking for relevance filtering, in embedding model tokens
+CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', '64'))
+CHUNK_OVERLAP_TOKENS = int(os.getenv('CHUNK_OVERLAP_TOKENS', '16'))  # Repeated from the end of the previous passage
+
+# Evidence retriever: 'web' (Google Custom Search) or 'local' (offline BM25 + vector index)
+EVIDENCE_RETRIEVER = os.getenv('EVIDENCE_RETRIEVER', 'web')
+LOCAL_INDEX_DIR = os.getenv('LOCAL_INDEX_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'local_index'))
+LOCAL_INDEX_TOP_K = int(os.getenv('LOCAL_INDEX_TOP_K', '5'))  # Documents returned per claim
+LOCAL_INDEX_MAX_DF = float(os.getenv('LOCAL_INDEX_MAX_DF', '0.1'))  # BM25 skips terms found in more of the passages
+LOCAL_INDEX_MAX_POSTINGS = int(os.getenv('LOCAL_INDEX_MAX_POSTINGS', '10000'))  # Postings read per query term
+LOCAL_INDEX_NPROBE = int(os.getenv('LOCAL_INDEX_NPROBE', '8'))  # Vector index lists searched per query
+
+# Logging
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
@@ -1,180 +1,196 @@
 # backend/evaluate_app.py
 
-import pandas as pd
+import argparse
+import json
 import numpy as np
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support, classification_report
-import time
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Adjust the Python path to include the backend directory
 backend_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(backend_dir)
 
 # Import your application's models and utilities
-from models.ensemble_claim_detection_model import EnsembleClaimDetectionModel
-from models.advanced_claim_verification_model import AdvancedClaimVerificationModel
-from models.multi_hop_reasoning_model import MultiHopReasoningModel
-from models.question_answering_model import QuestionAnsweringModel
 from utils.text_preprocessing import preprocess_text
-from utils.evidence_retrieval import retrieve_evidence
-from utils.relevance_filtering import RelevanceFilter
-from utils.similarity import SimilarityCalculator
-from utils.knowledge_graph import query_wikidata, extract_texts_from_kg_results
-
-# Initialize models
-claim_detector = EnsembleClaimDetectionModel()
-claim_verifier = AdvancedClaimVerificationModel()
-similarity_calculator = SimilarityCalculator()
-relevance_filter = RelevanceFilter(model=similarity_calculator.model)
-multi_hop_reasoner = MultiHopReasoningModel()
-qa_model = QuestionAnsweringModel()
-
-def process_claim(claim_text):
-    # Preprocess the claim
+from utils.liar import load_liar_dataset, map_ground_truth_label
+from utils.cache import disk_cache
+from models.registry import build_registry
+from pipeline import FactChecker
+from records import Claim
+
+# Initialize models in parallel (multi-hop reasoning is used for most claims here, so load it up front;
+# the verdict cache is not used so that every row is really evaluated)
+model_registry = build_registry(deferred=('verdict_store',)).start()
+claim_detector = model_registry.handle('claim_detector')
+
+# The same pipeline as /analyze (evidence planner, relevance ordering and cascade), so the
+# evaluation measures what the server does
+fact_checker = FactChecker(claim_detector, model_registry.handle('claim_verifier'),
+                           model_registry.handle('similarity_calculator'), model_registry.handle('relevance_filter'),
+                           model_registry.handle('multi_hop_reasoner'), model_registry.handle('qa_model'),
+                           retriever=model_registry.handle('retriever'))
+
+def process_claim(claim_text, detection=None):
+    """
+    Checks a statement as /analyze checks one claim. Returns (label, confidence),
+    or (None, None) when it is not detected as a factual claim.
+    """
     cleaned_claim = preprocess_text(claim_text)
 
-    # Step 1: Claim Detection
-    predicted_class, predicted_label, confidence = claim_detector.predict(cleaned_claim)
+    # Claim Detection (use the batched prediction when provided)
+    if detection is None:
+        detection = claim_detector.predict_batch([cleaned_claim])[0]
+    predicted_class, predicted_label, confidence = detection
     if predicted_class != 1:
         # Not a factual claim
         return None, None
 
-    # Step 2: Evidence Retrieval
-    evidence_list = retrieve_evidence(cleaned_claim)
-    if not evidence_list:
-        return 'Not Enough Information', 0.0
-
-    relevant_evidences = []
-    evidence_sources = []
-
-    # Process evidence from web search
-    for evidence in evidence_list:
-        full_content = evidence['content']
-        if not full_content:
-            continue
-
-        # Extract relevant passages
-        relevant_text = relevance_filter.extract_relevant_passages(cleaned_claim, full_content, top_k=3)
-        if not relevant_text:
-            continue
-
-        # Compute similarity
-        similarity_score = similarity_calculator.compute_similarity(cleaned_claim, relevant_text)
-
-        threshold = 0.5  # Adjust as needed
-        if similarity_score >= threshold:
-            relevant_evidences.append(relevant_text)
-            evidence_sources.append(evidence['url'])
-        else:
-            continue
-
-    # Knowledge Graph Query
-    kg_results = query_wikidata(cleaned_claim)
-    kg_evidences = extract_texts_from_kg_results(kg_results)
-    if kg_evidences:
-        relevant_evidences.extend(kg_evidences)
-        for result in kg_results.get("results", {}).get("bindings", []):
-            item_url = result["item"]["value"]
-            evidence_sources.append(item_url)
-    time.sleep(1)  # To prevent rate limiting
-
-    if not relevant_evidences:
-        return 'Not Enough Information', 0.0
-
-    verifications = []
-
-    # Use QA Model for Fact Extraction
-    for idx, evidence_text in enumerate(relevant_evidences):
-        answer, score = qa_model.extract_answer(cleaned_claim, evidence_text)
-        if score > 0.1:
-            # Verify the claim
-            predicted_label, confidence = claim_verifier.verify(cleaned_claim, answer)
-            verifications.append({
-                'label': predicted_label,
-                'confidence': confidence
-            })
-        else:
-            continue
-
-    # Multi-Hop Reasoning
-    if len(relevant_evidences) > 1:
-        answer = multi_hop_reasoner.reason_over_evidence(cleaned_claim, relevant_evidences)
-        predicted_label, confidence = claim_verifier.verify(cleaned_claim, answer)
-        verifications.append({
-            'label': predicted_label,
-            'confidence': confidence
-        })
-
-    if not verifications:
+    # Evidence retrieval, relevance filtering, verification and aggregation
+    result = fact_checker.check_claim(Claim(cleaned_claim, confidence, predicted_label))
+    if result is None:
         return 'Not Enough Information', 0.0
+    return result.classification, result.confidence
+
+def load_results(results_path):
+    """
+    Reads the incremental results file. Returns a dict of row id -> record.
+    A partially written last line (e.g. after a crash) is ignored.
+    """
+    results = {}
+    if not os.path.exists(results_path):
+        return results
+    with open(results_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results[record['id']] = record
+    return results
+
+def evaluate_row(row, detection):
+    started = time.perf_counter()
+    predicted_label, confidence = process_claim(row['statement'], detection=detection)
+    if predicted_label is None:
+        # Claim was not detected as a factual claim
+        predicted_label = 'Not a Claim'
+    return {
+        'id': row['id'],
+        'statement': row['statement'],
+        'ground_truth': map_ground_truth_label(row['label']),
+        'predicted': predicted_label,
+        'confidence': confidence,
+        'seconds': time.perf_counter() - started
+    }
 
-    # Aggregation of Results
-    labels = [v['label'] for v in verifications]
-    final_label = max(set(labels), key=labels.count)
-    average_confidence = sum([v['confidence'] for v in verifications]) / len(verifications)
-
-    return final_label, average_confidence
-
-def map_ground_truth_label(label):
-    # Map LIAR dataset labels to your application's labels
-    label_mapping = {
-        'true': 'Supported',
-        'mostly-true': 'Supported',
-        'half-true': 'Not Enough Information',
-        'barely-true': 'Refuted',
-        'false': 'Refuted',
-        'pants-fire': 'Refuted'
+def failed_record(row, error, seconds):
+    return {
+        'id': row['id'],
+        'statement': row['statement'],
+        'ground_truth': map_ground_truth_label(row['label']),
+        'predicted': None,
+        'confidence': None,
+        'seconds': seconds,
+        'error': f"{type(error).__name__}: {error}"
     }
-    return label_mapping.get(label.lower(), 'Not Enough Information')
 
-def main():
-    # Adjust the path to the dataset
-    dataset_path = os.path.join(backend_dir, 'data', 'train.tsv')
-    if not os.path.exists(dataset_path):
-        print(f"Dataset not found at {dataset_path}")
+def run_evaluation(liar_df, results_path, workers, chunk_size, retry_failed=False):
+    """
+    Evaluates every row not yet in the results file, appending one JSON line per
+    finished row so an interrupted run resumes where it stopped. A row that raises
+    is recorded as failed and skipped on resume unless retry_failed is set.
+    """
+    done_ids = {row_id for row_id, record in load_results(results_path).items()
+                if not (retry_failed and 'error' in record)}
+    remaining = liar_df[~liar_df['id'].isin(done_ids)]
+    print(f"Total samples: {len(liar_df)}, already done: {len(liar_df) - len(remaining)}, remaining: {len(remaining)}")
+
+    processed = 0
+    failed = 0
+    started = time.perf_counter()
+    with open(results_path, 'a', encoding='utf-8') as results_file, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(remaining), chunk_size):
+            chunk = remaining.iloc[start:start + chunk_size]
+            # Run claim detection over the whole chunk in batches
+            cleaned_statements = [preprocess_text(statement) for statement in chunk['statement']]
+            detections = claim_detector.predict_batch(cleaned_statements)
+
+            submitted = time.perf_counter()
+            futures = {executor.submit(evaluate_row, row, detection): row
+                       for (_, row), detection in zip(chunk.iterrows(), detections)}
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # e.g. a search API error or a timeout: record the row and keep going
+                    record = failed_record(futures[future], e, time.perf_counter() - submitted)
+                    failed += 1
+                results_file.write(json.dumps(record) + '\n')
+                results_file.flush()
+                processed += 1
+                outcome = record['predicted'] if 'error' not in record else f"failed ({record['error']})"
+                print(f"[{len(done_ids) + processed}/{len(liar_df)}] {outcome} "
+                      f"(truth: {record['ground_truth']}, {record['seconds']:.1f}s)")
+
+    elapsed = time.perf_counter() - started
+    if processed:
+        print(f"\nProcessed {processed} claims ({failed} failed) in {elapsed:.1f}s "
+              f"({processed / elapsed:.2f} claims/s)")
+
+def report(results_path):
+    records = list(load_results(results_path).values())
+    failed = sum(1 for record in records if 'error' in record)
+    records = [record for record in records if 'error' not in record]
+    if failed:
+        print(f"\n{failed} rows failed and are left out of the report (rerun with --retry-failed).")
+    if not records:
+        print("No results to report.")
         return
-
-    # Load the LIAR dataset
-    liar_df = pd.read_csv(dataset_path, sep='\t', header=None)
-    liar_df.columns = [
-        'id', 'label', 'statement', 'subject', 'speaker', 'speaker_job_title',
-        'state_info', 'party_affiliation', 'barely_true_counts', 'false_counts',
-        'half_true_counts', 'mostly_true_counts', 'pants_on_fire_counts',
-        'context'
-    ]
-
-    # Lists to store results
-    y_true = []
-    y_pred = []
-
-    total_samples = len(liar_df)
-    print(f"Total samples to process: {total_samples}")
-
-    for index, row in liar_df.iterrows():
-        claim_text = row['statement']
-        ground_truth_label = map_ground_truth_label(row['label'])
-        print(f"\nProcessing claim {index + 1}/{total_samples}: {claim_text}")
-        print(f"Ground truth label: {ground_truth_label}")
-
-        predicted_label, confidence = process_claim(claim_text)
-        if predicted_label is None:
-            # Claim was not detected as a factual claim
-            predicted_label = 'Not a Claim'
-
-        print(f"Predicted label: {predicted_label}, Confidence: {confidence}")
-
-        y_true.append(ground_truth_label)
-        y_pred.append(predicted_label)
+    y_true = [record['ground_truth'] for record in records]
+    y_pred = [record['predicted'] for record in records]
 
     # Evaluation Metrics
     labels = ['Supported', 'Refuted', 'Not Enough Information', 'Not a Claim']
-    print("\nClassification Report:")
+    print(f"\nClassification Report ({len(records)} claims):")
     print(classification_report(y_true, y_pred, labels=labels, digits=4))
 
     # Overall Accuracy
     accuracy = accuracy_score(y_true, y_pred)
     print(f"Overall Accuracy: {accuracy:.4f}")
 
+    seconds = np.array([record['seconds'] for record in records])
+    print(f"Latency per claim: mean {seconds.mean():.2f}s, p50 {np.percentile(seconds, 50):.2f}s, "
+          f"p95 {np.percentile(seconds, 95):.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the fact-checking pipeline on the LIAR dataset.")
+    parser.add_argument('--dataset', default=os.path.join(backend_dir, 'data', 'train.tsv'))
+    parser.add_argument('--results', default=os.path.join(backend_dir, 'data', 'liar_results.jsonl'),
+                        help="Incremental results file; existing rows are skipped on resume.")
+    parser.add_argument('--workers', type=int, default=8, help="Claims evaluated concurrently.")
+    parser.add_argument('--chunk-size', type=int, default=256, help="Rows per claim detection batch.")
+    parser.add_argument('--limit', type=int, default=None, help="Only evaluate the first N rows.")
+    parser.add_argument('--retry-failed', action='store_true', help="Evaluate rows that failed in earlier runs again.")
+    parser.add_argument('--report-only', action='store_true', help="Print the report from the results file.")
+    args = parser.parse_args()
+
+    if not args.report_only:
+        if not os.path.exists(args.dataset):
+            print(f"Dataset not found at {args.dataset}")
+            return
+
+        # Load the LIAR dataset
+        liar_df = load_liar_dataset(args.dataset)
+        if args.limit is not None:
+            liar_df = liar_df.head(args.limit)
+        run_evaluation(liar_df, args.results, args.workers, args.chunk_size, retry_failed=args.retry_failed)
+        print(f"\nCache statistics: {disk_cache.stats()}")
+
+    report(args.results)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,275 @@
+# backend/jobs.py
+
+import multiprocessing
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from config import JOB_WORKERS, JOB_WORKER_MODE, JOB_MAX_QUEUED, JOB_RETENTION, JOB_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(Exception):
+    pass
+
+def _worker_loop(handler, initializer, tasks, results, snapshot=None):
+    if initializer is not None:
+        initializer()
+    while True:
+        item = tasks.get()
+        if item is None:
+            break
+        job_id, payload = item
+        results.put((job_id, 'running', os.getpid()))
+        try:
+            outcome = ('done', handler(payload))
+        except Exception as e:
+            outcome = ('failed', str(e))
+        if snapshot is not None:
+            # Sent ahead of the outcome, so a finished job is already counted
+            try:
+                results.put((None, 'metrics', (os.getpid(), snapshot())))
+            except Exception:
+                logger.exception("Collecting the metrics of job worker %s failed", os.getpid())
+        results.put((job_id, *outcome))
+
+def _zygote_loop(handler, initializer, tasks, results, workers, snapshot):
+    # Forked once at startup and single-threaded from then on: every worker, replacements
+    # included, is forked from here, so none inherits a lock that a thread of the busy
+    # serving process happened to hold. Reports each worker that exits and forks a new one.
+    children = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 1
+            try:
+                _worker_loop(handler, initializer, tasks, results, snapshot)
+                code = 0
+            except BaseException:
+                logger.exception("Job worker %s failed", os.getpid())
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    def terminate(signum, frame):
+        for pid in children:
+            os.kill(pid, signal.SIGKILL)
+        os._exit(0)
+
+    signal.signal(signal.SIGTERM, terminate)
+    for _ in range(workers):
+        spawn()
+    while True:
+        pid, status = os.wait()
+        children.discard(pid)
+        logger.warning("Job worker %s exited with code %s, starting a new one", pid, os.waitstatus_to_exitcode(status))
+        results.put((None, 'exited', pid))
+        time.sleep(1)  # Do not spin if workers die right after starting
+        spawn()
+
+class JobQueue:
+    """
+    Runs handler(payload) for submitted jobs on a pool of workers.
+
+    In 'fork' mode the workers are processes forked after the models have been
+    loaded, so they share the model weights copy-on-write. Jobs wait in a bounded
+    local queue and are only handed to a worker once one is idle, which gives
+    backpressure (QueueFullError) and lets queued jobs be cancelled. A worker process
+    that dies fails the job it was running and is replaced; one that runs a job for
+    longer than timeout seconds is killed. Worker processes send snapshot() back after
+    every job, so the parent can report what they did.
+    """
+    def __init__(self, handler, workers=JOB_WORKERS, mode=JOB_WORKER_MODE, max_queued=JOB_MAX_QUEUED,
+                 retention=JOB_RETENTION, initializer=None, timeout=JOB_TIMEOUT, snapshot=None):
+        if mode == 'fork' and 'fork' not in multiprocessing.get_all_start_methods():
+            mode = 'thread'
+        self.handler = handler
+        self.initializer = initializer
+        self.snapshot = snapshot
+        self.workers = workers
+        self.mode = mode
+        self.max_queued = max_queued
+        self.retention = retention
+        self.timeout = timeout
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.pending = queue.Queue(maxsize=max_queued)
+        self.idle = threading.Semaphore(workers)
+        self.counters = {'submitted': 0, 'rejected': 0, 'done': 0, 'failed': 0, 'cancelled': 0}
+        self.started = False
+        self.zygote = None
+        self.worker_jobs = {}  # Worker process pid -> id of the job it is running
+        self.worker_snapshots = {}  # Worker process pid -> its latest snapshot(), kept after it exits
+
+    def start(self):
+        """
+        Starts the workers. Call this once at startup, after the models are loaded so forked
+        workers share them; the initializer must recreate the thread pools a child inherits.
+        """
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+        if self.mode == 'fork' and self.workers:
+            context = multiprocessing.get_context('fork')
+            self.tasks = context.Queue()
+            # Written synchronously, so a worker that dies cannot lose messages it already sent
+            self.results = context.SimpleQueue()
+            self.zygote = context.Process(target=_zygote_loop, name='job-zygote', daemon=True,
+                                          args=(self.handler, self.initializer, self.tasks, self.results, self.workers,
+                                                self.snapshot))
+            self.zygote.start()
+        else:
+            self.tasks = queue.Queue()
+            self.results = queue.Queue()
+            for _ in range(self.workers):
+                threading.Thread(target=_worker_loop, daemon=True,
+                                 args=(self.handler, None, self.tasks, self.results)).start()
+        threading.Thread(target=self._dispatch, daemon=True).start()
+        threading.Thread(target=self._collect, daemon=True).start()
+        threading.Thread(target=self._monitor, daemon=True).start()
+
+    def submit(self, payload):
+        """
+        Queues a job. Jobs submitted before start() wait until the workers are up.
+        """
+        job_id = uuid.uuid4().hex
+        job = {'id': job_id, 'status': 'queued', 'submitted_at': time.time(), 'started_at': None,
+               'finished_at': None, 'result': None, 'error': None, 'payload': payload}
+        with self.lock:
+            try:
+                self.pending.put_nowait(job_id)
+            except queue.Full:
+                self.counters['rejected'] += 1
+                raise QueueFullError(f"Job queue is full ({self.max_queued} jobs waiting).")
+            self.jobs[job_id] = job
+            self.counters['submitted'] += 1
+        return job_id
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if key != 'payload'}
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued or running job. A running job finishes in its worker but its result is discarded.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job['status'] not in ('queued', 'running'):
+                return False
+            self._finish(job, 'cancelled')
+            return True
+
+    def metrics(self):
+        with self.lock:
+            statuses = [job['status'] for job in self.jobs.values()]
+            return {
+                'workers': self.workers,
+                'mode': self.mode,
+                'max_queued': self.max_queued,
+                'queue_depth': statuses.count('queued'),
+                'running': statuses.count('running'),
+                **self.counters
+            }
+
+    def worker_metrics(self):
+        """
+        The latest snapshot() of every worker process, including those that have exited.
+        """
+        with self.lock:
+            return list(self.worker_snapshots.values())
+
+    def _finish(self, job, status, result=None, error=None):
+        # Callers hold self.lock
+        job['status'] = status
+        job['result'] = result
+        job['error'] = error
+        job['finished_at'] = time.time()
+        job['payload'] = None
+        self.counters[status] += 1
+        finished = [job_id for job_id, j in self.jobs.items() if j['finished_at'] is not None]
+        for job_id in finished[:max(0, len(finished) - self.retention)]:
+            del self.jobs[job_id]
+
+    def _dispatch(self):
+        while True:
+            job_id = self.pending.get()
+            # Wait for an idle worker so cancelled jobs never reach one
+            self.idle.acquire()
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job is None or job['status'] != 'queued':
+                    self.idle.release()
+                    continue
+                payload = job['payload']
+            self.tasks.put((job_id, payload))
+
+    def _monitor(self):
+        # Fails jobs that run past the timeout. A worker process running one is killed; the
+        # zygote then reports it as exited, which frees its slot. A worker thread cannot be
+        # killed, so its slot is only freed once the job returns.
+        zygote_alive = True
+        while True:
+            time.sleep(1)
+            if self.zygote is not None and zygote_alive and not self.zygote.is_alive():
+                zygote_alive = False
+                logger.error("Job zygote exited with code %s; workers that die are no longer replaced",
+                             self.zygote.exitcode)
+            if not self.timeout:
+                continue
+            now = time.time()
+            with self.lock:
+                expired = [job for job in self.jobs.values()
+                           if job['status'] == 'running' and now - job['started_at'] > self.timeout]
+                for job in expired:
+                    logger.warning("Job %s timed out after %.0fs", job['id'], now - job['started_at'])
+                    self._finish(job, 'failed', error=f"Job timed out after {self.timeout:.0f}s.")
+                    for pid, running in self.worker_jobs.items():
+                        if running == job['id']:
+                            try:
+                                os.kill(pid, signal.SIGKILL)
+                            except ProcessLookupError:
+                                pass
+
+    def _collect(self):
+        while True:
+            job_id, status, value = self.results.get()
+            with self.lock:
+                if status == 'metrics':
+                    pid, snapshot = value
+                    self.worker_snapshots[pid] = snapshot
+                    continue
+                if status == 'exited':
+                    job_id = self.worker_jobs.pop(value, None)
+                    job = self.jobs.get(job_id)
+                    if job_id is not None:
+                        # The worker's slot is free again
+                        if job is not None and job['status'] == 'running':
+                            self._finish(job, 'failed', error='The worker process running this job died.')
+                        self.idle.release()
+                    continue
+                job = self.jobs.get(job_id)
+                if status == 'running':
+                    if self.mode == 'fork':
+                        self.worker_jobs[value] = job_id
+                    if job is not None and job['status'] == 'queued':
+                        job['status'] = 'running'
+                        job['started_at'] = time.time()
+                    continue
+                self.worker_jobs = {pid: running for pid, running in self.worker_jobs.items() if running != job_id}
+                if job is not None and job['status'] == 'running':
+                    if status == 'done':
+                        self._finish(job, 'done', result=value)
+                    else:
+                        self._finish(job, 'failed', error=value)
+            self.idle.release()
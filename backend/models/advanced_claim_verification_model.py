@@ -1,14 +1,14 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers import AutoTokenizer
 import torch
+from models.backends import load_model, get_device
 
 class AdvancedClaimVerificationModel:
-    def __init__(self):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    def __init__(self, batch_size=16, backend=None):
+        self.device = get_device()
+        self.batch_size = batch_size
         # Use a suitable pre-trained model
         self.tokenizer = AutoTokenizer.from_pretrained('facebook/bart-large-mnli')
-        self.model = AutoModelForSequenceClassification.from_pretrained('facebook/bart-large-mnli')
-        self.model.to(self.device)
-        self.model.eval()
+        self.model = load_model('facebook/bart-large-mnli', 'sequence-classification', backend=backend, device=self.device)
         self.nli_labels = ["contradiction", "neutral", "entailment"]
         # Map NLI labels to application labels
         self.label_mapping = {
@@ -18,13 +18,31 @@ class AdvancedClaimVerificationModel:
         }
 
     def verify(self, claim, evidence):
-        inputs = self.tokenizer(claim, evidence, return_tensors='pt', truncation=True, max_length=512).to(self.device)
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        logits = outputs.logits
-        probabilities = torch.softmax(logits, dim=-1)[0]
-        predicted_class = torch.argmax(probabilities).item()
-        confidence = probabilities[predicted_class].item()
-        nli_label = self.nli_labels[predicted_class]
-        predicted_label = self.label_mapping[nli_label]
-        return predicted_label, confidence
+        return self.verify_batch([(claim, evidence)])[0]
+
+    def verify_batch(self, pairs):
+        """
+        Verifies a list of (claim, evidence) pairs, running NLI over padded,
+        length-sorted micro-batches. Returns (label, confidence) per pair.
+        """
+        if not pairs:
+            return []
+
+        claims = [claim for claim, _ in pairs]
+        evidences = [evidence for _, evidence in pairs]
+        lengths = [len(ids) for ids in self.tokenizer(claims, evidences, truncation=True, max_length=512)['input_ids']]
+        order = sorted(range(len(pairs)), key=lambda i: lengths[i])
+
+        results = [None] * len(pairs)
+        for start in range(0, len(order), self.batch_size):
+            batch_indices = order[start:start + self.batch_size]
+            inputs = self.tokenizer([claims[i] for i in batch_indices], [evidences[i] for i in batch_indices],
+                                    return_tensors='pt', padding=True, truncation=True, max_length=512).to(self.device)
+            with torch.no_grad():
+                outputs = self.model(**inputs)
+            probabilities = torch.softmax(outputs.logits, dim=-1)
+            confidences, predicted_classes = probabilities.max(dim=-1)
+            for i, predicted_class, confidence in zip(batch_indices, predicted_classes.tolist(), confidences.tolist()):
+                nli_label = self.nli_labels[predicted_class]
+                results[i] = (self.label_mapping[nli_label], confidence)
+        return results
@@ -0,0 +1,64 @@
+# backend/models/backends.py
+
+import logging
+import os
+import torch
+from transformers import AutoModelForSequenceClassification, AutoModelForQuestionAnswering, AutoModelForSeq2SeqLM
+from config import INFERENCE_BACKEND, ONNX_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('pytorch', 'quantized', 'onnx')
+
+# Transformers class and the matching ONNX Runtime class name in optimum.onnxruntime
+MODEL_TASKS = {
+    'sequence-classification': (AutoModelForSequenceClassification, 'ORTModelForSequenceClassification'),
+    'question-answering': (AutoModelForQuestionAnswering, 'ORTModelForQuestionAnswering'),
+    'seq2seq': (AutoModelForSeq2SeqLM, 'ORTModelForSeq2SeqLM'),
+}
+
+def get_device():
+    return torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+def load_model(model_name, task, backend=None, device=None):
+    """
+    Loads a model for inference with the configured backend:
+    - 'pytorch': full-precision eager PyTorch
+    - 'quantized': PyTorch with dynamic int8 quantization of the Linear layers (CPU only)
+    - 'onnx': ONNX Runtime graph, exported once and cached under ONNX_CACHE_DIR
+    The returned model is on the device and in eval mode.
+    """
+    backend = backend or INFERENCE_BACKEND
+    device = device or get_device()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}.")
+    model_class, ort_class_name = MODEL_TASKS[task]
+
+    if backend == 'onnx':
+        return _load_onnx(model_name, ort_class_name, device)
+
+    # Safetensors checkpoints are memory-mapped; low_cpu_mem_usage avoids a second random-initialised copy
+    model = model_class.from_pretrained(model_name, low_cpu_mem_usage=True)
+    model.eval()
+    if backend == 'quantized':
+        if device.type != 'cpu':
+            logger.warning("Dynamic quantization only runs on CPU, loading %s in full precision.", model_name)
+        else:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.to(device)
+    return model
+
+def _load_onnx(model_name, ort_class_name, device):
+    try:
+        import optimum.onnxruntime as ort
+    except ImportError:
+        raise ImportError("The 'onnx' inference backend requires optimum: pip install optimum[onnxruntime]")
+    ort_class = getattr(ort, ort_class_name)
+    export_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace('/', '__'))
+    provider = 'CUDAExecutionProvider' if device.type == 'cuda' else 'CPUExecutionProvider'
+    if os.path.isdir(export_dir):
+        return ort_class.from_pretrained(export_dir, provider=provider)
+    logger.info("Exporting %s to ONNX in %s", model_name, export_dir)
+    model = ort_class.from_pretrained(model_name, export=True, provider=provider)
+    model.save_pretrained(export_dir)
+    return model
@@ -1,13 +1,12 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers import AutoTokenizer
 import torch
+from models.backends import load_model, get_device
 
 class ClaimDetectionModel:
-    def __init__(self):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    def __init__(self, backend=None):
+        self.device = get_device()
         self.tokenizer = AutoTokenizer.from_pretrained('Nithiwat/xlm-roberta-base_claim-detection')
-        self.model = AutoModelForSequenceClassification.from_pretrained('Nithiwat/xlm-roberta-base_claim-detection')
-        self.model.to(self.device)
-        self.model.eval()
+        self.model = load_model('Nithiwat/xlm-roberta-base_claim-detection', 'sequence-classification', backend=backend, device=self.device)
         self.label_mapping = {0: 'Non-claim', 1: 'Claim'}
 
     def predict(self, text):
@@ -1,13 +1,12 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from transformers import AutoTokenizer
 import torch
+from models.backends import load_model, get_device
 
 class ClaimVerificationModel:
-    def __init__(self):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    def __init__(self, backend=None):
+        self.device = get_device()
         self.tokenizer = AutoTokenizer.from_pretrained('MoritzLaurer/DeBERTa-v3-large-mnli-fever-anli-ling-wanli')
-        self.model = AutoModelForSequenceClassification.from_pretrained('MoritzLaurer/DeBERTa-v3-large-mnli-fever-anli-ling-wanli')
-        self.model.to(self.device)
-        self.model.eval()
+        self.model = load_model('MoritzLaurer/DeBERTa-v3-large-mnli-fever-anli-ling-wanli', 'sequence-classification', backend=backend, device=self.device)
         self.label_names = ["entailment", "neutral", "contradiction"]
 
     def verify(self, claim, evidence):
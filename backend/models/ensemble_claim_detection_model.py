@@ -1,12 +1,16 @@
 # backend/models/ensemble_claim_detection_model.py
 
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import logging
+from transformers import AutoTokenizer
 import torch
-import numpy as np
+from models.backends import load_model, get_device
+
+logger = logging.getLogger(__name__)
 
 class EnsembleClaimDetectionModel:
-    def __init__(self):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    def __init__(self, batch_size=32, backend=None):
+        self.device = get_device()
+        self.batch_size = batch_size
 
         # Load models and tokenizers
         self.models = []
@@ -19,37 +23,55 @@ class EnsembleClaimDetectionModel:
 
         for model_name in model_names:
             tokenizer = AutoTokenizer.from_pretrained(model_name)
-            model = AutoModelForSequenceClassification.from_pretrained(model_name)
-            model.to(self.device)
-            model.eval()
+            model = load_model(model_name, 'sequence-classification', backend=backend, device=self.device)
             self.tokenizers.append(tokenizer)
             self.models.append(model)
 
         self.label_mapping = {0: 'Non-claim', 1: 'Claim'}
 
     def predict(self, text):
-        logits_list = []
-        for tokenizer, model in zip(self.tokenizers, self.models):
-            inputs = tokenizer(text, return_tensors='pt', truncation=True, max_length=512).to(self.device)
-            with torch.no_grad():
-                outputs = model(**inputs)
-            logits = outputs.logits.cpu().numpy()
-
-            # Ensure logits have shape (1, 2)
-            if logits.shape[-1] == 2:
-                logits_list.append(logits)
-            else:
-                print(f"Model {model} outputs incompatible logits shape: {logits.shape}")
-
-        if not logits_list:
-            raise ValueError("No valid logits collected from models.")
-
-        # Aggregate logits
-        logits_array = np.vstack(logits_list)
-        avg_logits = np.mean(logits_array, axis=0)
-        probabilities = torch.softmax(torch.tensor(avg_logits), dim=-1)
-        predicted_class = torch.argmax(probabilities).item()
-        confidence = probabilities[predicted_class].item()
-        predicted_label = self.label_mapping.get(predicted_class, 'Unknown')
-
-        return predicted_class, predicted_label, confidence
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts):
+        """
+        Predicts (class, label, confidence) for every text, running each
+        ensemble member once per length-sorted micro-batch.
+        """
+        if not texts:
+            return []
+
+        # Sort by token length so each micro-batch pads to a similar length
+        lengths = [len(ids) for ids in self.tokenizers[0](list(texts), truncation=True, max_length=512)['input_ids']]
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+
+        results = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch_indices = order[start:start + self.batch_size]
+            batch_texts = [texts[i] for i in batch_indices]
+
+            logits_list = []
+            for tokenizer, model in zip(self.tokenizers, self.models):
+                inputs = tokenizer(batch_texts, return_tensors='pt', padding=True, truncation=True, max_length=512).to(self.device)
+                with torch.no_grad():
+                    outputs = model(**inputs)
+                logits = outputs.logits.cpu()
+
+                # Ensure logits have shape (batch, 2)
+                if logits.shape[-1] == 2:
+                    logits_list.append(logits)
+                else:
+                    logger.warning("Model %s outputs incompatible logits shape: %s", type(model).__name__, tuple(logits.shape))
+
+            if not logits_list:
+                raise ValueError("No valid logits collected from models.")
+
+            # Aggregate logits across ensemble members
+            avg_logits = torch.stack(logits_list).mean(dim=0)
+            probabilities = torch.softmax(avg_logits, dim=-1)
+            confidences, predicted_classes = probabilities.max(dim=-1)
+
+            for i, predicted_class, confidence in zip(batch_indices, predicted_classes.tolist(), confidences.tolist()):
+                predicted_label = self.label_mapping.get(predicted_class, 'Unknown')
+                results[i] = (predicted_class, predicted_label, confidence)
+
+        return results
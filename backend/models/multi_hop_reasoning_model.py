@@ -1,26 +1,97 @@
 # backend/models/multi_hop_reasoning_model.py
 
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+from transformers import AutoTokenizer
 import torch
+from models.backends import load_model, get_device
+from utils.chunking import SENTENCE_BOUNDARY
+from config import MULTI_HOP_MODE, MULTI_HOP_TOKEN_BUDGET, MULTI_HOP_MAX_NEW_TOKENS, MULTI_HOP_MIN_PASSAGE_TOKENS
 
 class MultiHopReasoningModel:
-    def __init__(self):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    """
+    Answers a claim over several evidences with UnifiedQA-T5.
+
+    In 'packed' mode the evidences, most relevant first, are split into passages that are
+    packed into a token budget round-robin across the evidences, so every page and the
+    knowledge graph get their best passages in. Answers are decoded greedily with the
+    decoder's key/value cache. The 'legacy' mode keeps the original behaviour: everything
+    concatenated and cut at 1024 tokens.
+    """
+    def __init__(self, backend=None, mode=MULTI_HOP_MODE, token_budget=MULTI_HOP_TOKEN_BUDGET,
+                 max_new_tokens=MULTI_HOP_MAX_NEW_TOKENS, min_passage_tokens=MULTI_HOP_MIN_PASSAGE_TOKENS):
+        self.device = get_device()
         # Specify use_fast=False to use the slow tokenizer compatible with SentencePiece
         self.tokenizer = AutoTokenizer.from_pretrained('allenai/unifiedqa-t5-large', use_fast=False, legacy=True)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained('allenai/unifiedqa-t5-large')
-        self.model.to(self.device)
-        self.model.eval()
+        self.model = load_model('allenai/unifiedqa-t5-large', 'seq2seq', backend=backend, device=self.device)
+        self.mode = mode
+        self.token_budget = token_budget
+        self.max_new_tokens = max_new_tokens
+        self.min_passage_tokens = min_passage_tokens
+        # UnifiedQA separates the question from the context with a literal "\n"
+        self.separator_ids = self.tokenizer.encode(' \\n', add_special_tokens=False)
 
     def reason_over_evidence(self, question, evidences):
         """
         Combines multiple evidences to answer the question (claim).
         """
-        # Combine evidences into a single context
-        context = ' '.join(evidences)
-        input_text = f"{question} \\n {context}"
-        inputs = self.tokenizer.encode(input_text, return_tensors='pt', truncation=True, max_length=1024).to(self.device)
+        return self.reason_batch([(question, evidences)])[0]
+
+    def reason_batch(self, items, mode=None):
+        """
+        Answers a list of (question, evidences) items with one padded generate call.
+        Evidences are expected in order of relevance.
+        """
+        if not items:
+            return []
+        if (mode or self.mode) == 'legacy':
+            return self._reason_legacy(items)
+
+        inputs = self.tokenizer.pad({'input_ids': [self.pack(question, evidences) for question, evidences in items]},
+                                    return_tensors='pt').to(self.device)
+        with torch.no_grad():
+            outputs = self.model.generate(**inputs, max_new_tokens=self.max_new_tokens, num_beams=1,
+                                          do_sample=False, use_cache=True)
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def pack(self, question, evidences):
+        """
+        Returns the input ids of the question and of the evidence passages that fit in the token budget.
+        """
+        input_ids = self.tokenizer.encode(question, add_special_tokens=False) + self.separator_ids
+        remaining = self.token_budget - len(input_ids) - 1  # Room for the end-of-sequence token
+        sources = [self._passage_ids(evidence) for evidence in evidences]
+
+        # Round-robin over the evidences, so every source gets its best passage in before any gets
+        # its second and no single page fills the budget. Passages that no longer fit are skipped
+        # for shorter ones, or cut when at least min_passage_tokens of them fit
+        chosen = {}
+        for rank in range(max((len(passages) for passages in sources), default=0)):
+            for source, passages in enumerate(sources):
+                if rank >= len(passages) or remaining <= 0:
+                    continue
+                passage_ids = passages[rank]
+                if len(passage_ids) <= remaining:
+                    chosen[source, rank] = passage_ids
+                    remaining -= len(passage_ids)
+                elif remaining >= self.min_passage_tokens:
+                    chosen[source, rank] = passage_ids[:remaining]
+                    remaining = 0
+
+        # Lay the chosen passages out source by source, in their original order
+        for key in sorted(chosen):
+            input_ids.extend(chosen[key])
+        return input_ids[:self.token_budget - 1] + [self.tokenizer.eos_token_id]
+
+    def _passage_ids(self, evidence):
+        # Evidences arrive as their most relevant passages joined together; split them back at sentence boundaries
+        passages = [passage for passage in SENTENCE_BOUNDARY.split(evidence.strip()) if passage]
+        if not passages:
+            return []
+        return self.tokenizer(passages, add_special_tokens=False)['input_ids']
+
+    def _reason_legacy(self, items):
+        # Combine evidences into a single context per question
+        input_texts = [f"{question} \\n {' '.join(evidences)}" for question, evidences in items]
+        inputs = self.tokenizer(input_texts, return_tensors='pt', padding=True, truncation=True, max_length=1024).to(self.device)
         with torch.no_grad():
-            outputs = self.model.generate(inputs, max_length=50)
-        answer = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return answer
+            outputs = self.model.generate(**inputs, max_length=50)
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
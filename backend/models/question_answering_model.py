@@ -1,13 +1,35 @@
-from transformers import AutoTokenizer, AutoModelForQuestionAnswering, pipeline
+from transformers import AutoTokenizer, pipeline
+from models.backends import load_model
+import torch
 
 class QuestionAnsweringModel:
-    def __init__(self):
+    def __init__(self, batch_size=16, backend=None):
         self.tokenizer = AutoTokenizer.from_pretrained('deepset/roberta-base-squad2')
-        self.model = AutoModelForQuestionAnswering.from_pretrained('deepset/roberta-base-squad2')
+        self.model = load_model('deepset/roberta-base-squad2', 'question-answering', backend=backend, device=torch.device('cpu'))
         self.qa_pipeline = pipeline('question-answering', model=self.model, tokenizer=self.tokenizer)
+        self.batch_size = batch_size
 
     def extract_answer(self, question, context):
         result = self.qa_pipeline(question=question, context=context, max_answer_len=50)
         answer = result.get('answer', '')
         score = result.get('score', 0.0)
         return answer, score
+
+    def extract_answers(self, question, contexts):
+        """
+        Extracts an (answer, score) pair from every context in one pipeline call.
+        """
+        return self.answer_batch([(question, context) for context in contexts])
+
+    def answer_batch(self, pairs):
+        """
+        Extracts an (answer, score) pair for every (question, context) pair in one pipeline call.
+        """
+        if not pairs:
+            return []
+        results = self.qa_pipeline(question=[question for question, _ in pairs], context=[context for _, context in pairs],
+                                   max_answer_len=50, batch_size=self.batch_size)
+        # The pipeline unwraps single-element inputs
+        if isinstance(results, dict):
+            results = [results]
+        return [(result.get('answer', ''), result.get('score', 0.0)) for result in results]
@@ -0,0 +1,173 @@
+# backend/models/registry.py
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import BATCHING_ENABLED, DEFERRED_MODELS, VERDICT_CACHE_ENABLED, EVIDENCE_RETRIEVER
+
+logger = logging.getLogger(__name__)
+
+class ModelHandle:
+    """
+    Stand-in for a registry model: the first attribute access waits for it to load.
+    """
+    def __init__(self, registry, name):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+class ModelRegistry:
+    """
+    Loads models in parallel threads. Deferred models are only loaded on first use.
+    Factories receive the registry so they can depend on other models.
+    """
+    def __init__(self, factories, deferred=()):
+        self.factories = dict(factories)
+        self.deferred = set(deferred)
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=len(self.factories), thread_name_prefix='model-load')
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # The loader threads do not exist in a forked child: give it its own executor, and
+        # forget loads that had not finished so they are started again there on first use
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=len(self.factories), thread_name_prefix='model-load')
+        self.futures = {name: future for name, future in self.futures.items() if future.done()}
+
+    def _submit(self, name):
+        with self.lock:
+            if name not in self.futures:
+                logger.info("Loading model: %s", name)
+                self.futures[name] = self.executor.submit(self.factories[name], self)
+            return self.futures[name]
+
+    def start(self):
+        for name in self.factories:
+            if name not in self.deferred:
+                self._submit(name)
+        return self
+
+    def get(self, name):
+        return self._submit(name).result()
+
+    def handle(self, name):
+        return ModelHandle(self, name)
+
+    def wait(self, include_deferred=False):
+        """
+        Blocks until every non-deferred model is loaded, or every model with include_deferred.
+        """
+        for name in self.factories:
+            if include_deferred or name not in self.deferred:
+                self.get(name)
+
+    def is_ready(self):
+        with self.lock:
+            futures = [self.futures.get(name) for name in self.factories if name not in self.deferred]
+        return all(future is not None and future.done() and future.exception() is None for future in futures)
+
+    def loaded(self):
+        """
+        Returns {name: model} for the models that have finished loading.
+        """
+        with self.lock:
+            futures = dict(self.futures)
+        return {name: future.result() for name, future in futures.items()
+                if future.done() and future.exception() is None}
+
+    def status(self):
+        with self.lock:
+            futures = dict(self.futures)
+        status = {}
+        for name in self.factories:
+            future = futures.get(name)
+            if future is None:
+                status[name] = 'deferred'
+            elif not future.done():
+                status[name] = 'loading'
+            elif future.exception() is not None:
+                status[name] = f"failed: {future.exception()}"
+            else:
+                status[name] = 'ready'
+        return status
+
+def _batched(wrapper, model):
+    # Share batches across concurrent requests
+    return wrapper(model) if BATCHING_ENABLED else model
+
+def _load_claim_detector(registry):
+    from models.ensemble_claim_detection_model import EnsembleClaimDetectionModel
+    from models.serving import BatchedClaimDetector
+    return _batched(BatchedClaimDetector, EnsembleClaimDetectionModel())
+
+def _load_claim_verifier(registry):
+    from models.advanced_claim_verification_model import AdvancedClaimVerificationModel
+    from models.serving import BatchedClaimVerifier
+    return _batched(BatchedClaimVerifier, AdvancedClaimVerificationModel())
+
+def _load_qa_model(registry):
+    from models.question_answering_model import QuestionAnsweringModel
+    from models.serving import BatchedQuestionAnswerer
+    return _batched(BatchedQuestionAnswerer, QuestionAnsweringModel())
+
+def _load_multi_hop_reasoner(registry):
+    from models.multi_hop_reasoning_model import MultiHopReasoningModel
+    from models.serving import BatchedMultiHopReasoner
+    return _batched(BatchedMultiHopReasoner, MultiHopReasoningModel())
+
+def _load_similarity_calculator(registry):
+    from utils.similarity import SimilarityCalculator
+    return SimilarityCalculator()
+
+def _load_relevance_filter(registry):
+    from utils.relevance_filtering import RelevanceFilter
+    similarity_calculator = registry.get('similarity_calculator')
+    return RelevanceFilter(model=similarity_calculator.model, embeddings=similarity_calculator.embeddings)
+
+def _load_verdict_store(registry):
+    from utils.verdict_store import VerdictStore
+    return VerdictStore(registry.get('similarity_calculator').embeddings)
+
+def _load_retriever(registry):
+    if EVIDENCE_RETRIEVER == 'local':
+        from utils.local_index import LocalIndex, LocalRetriever
+        index = LocalIndex(registry.get('similarity_calculator').embeddings)
+        index.load_vectors()
+        return LocalRetriever(index)
+    from utils.evidence_retrieval import web_retriever
+    return web_retriever
+
+def _load_nlp(registry):
+    from utils.text_preprocessing import get_segmenter
+    return get_segmenter()
+
+def _load_entity_recognizer(registry):
+    from utils.text_preprocessing import get_entity_recognizer
+    return get_entity_recognizer()
+
+PIPELINE_MODELS = {
+    'nlp': _load_nlp,
+    'entity_recognizer': _load_entity_recognizer,
+    'claim_detector': _load_claim_detector,
+    'claim_verifier': _load_claim_verifier,
+    'similarity_calculator': _load_similarity_calculator,
+    'relevance_filter': _load_relevance_filter,
+    'multi_hop_reasoner': _load_multi_hop_reasoner,
+    'qa_model': _load_qa_model,
+    'verdict_store': _load_verdict_store,
+    'retriever': _load_retriever,
+}
+
+def build_registry(deferred=DEFERRED_MODELS):
+    """
+    Registry of the models used by the fact-checking pipeline, shared by app.py and evaluate_app.py.
+    """
+    factories = dict(PIPELINE_MODELS)
+    if not VERDICT_CACHE_ENABLED:
+        del factories['verdict_store']
+    return ModelRegistry(factories, deferred=deferred)
@@ -0,0 +1,64 @@
+# backend/models/serving.py
+
+from config import BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+from utils.batching import MicroBatcher
+
+class BatchedModel:
+    """
+    Base class for the serving wrappers: inputs from every in-flight request are
+    queued per model and run together. Other attributes fall through to the model.
+    """
+    def __init__(self, model, batch_fn, name, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.model = model
+        self.batcher = MicroBatcher(batch_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, name=name)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+class BatchedClaimDetector(BatchedModel):
+    def __init__(self, model, **kwargs):
+        super().__init__(model, model.predict_batch, 'claim_detection', **kwargs)
+
+    def predict(self, text):
+        return self.batcher.submit(text).result()
+
+    def predict_batch(self, texts):
+        return self.batcher.map(texts)
+
+class BatchedClaimVerifier(BatchedModel):
+    def __init__(self, model, **kwargs):
+        super().__init__(model, model.verify_batch, 'claim_verification', **kwargs)
+
+    def verify(self, claim, evidence):
+        return self.batcher.submit((claim, evidence)).result()
+
+    def verify_batch(self, pairs):
+        return self.batcher.map(pairs)
+
+class BatchedQuestionAnswerer(BatchedModel):
+    def __init__(self, model, **kwargs):
+        super().__init__(model, model.answer_batch, 'question_answering', **kwargs)
+
+    def extract_answer(self, question, context):
+        return self.batcher.submit((question, context)).result()
+
+    def extract_answers(self, question, contexts):
+        return self.batcher.map([(question, context) for context in contexts])
+
+    def answer_batch(self, pairs):
+        return self.batcher.map(pairs)
+
+class BatchedMultiHopReasoner(BatchedModel):
+    def __init__(self, model, **kwargs):
+        # Generation is much heavier per input, so keep its batches small
+        kwargs.setdefault('max_batch_size', 4)
+        super().__init__(model, model.reason_batch, 'multi_hop_reasoning', **kwargs)
+
+    def reason_over_evidence(self, question, evidences):
+        return self.batcher.submit((question, evidences)).result()
+
+    def reason_batch(self, items):
+        return self.batcher.map(items)
+
+def batching_stats(*models):
+    return {model.batcher.name: model.batcher.stats() for model in models if isinstance(model, BatchedModel)}
@@ -0,0 +1,282 @@
+# backend/pipeline.py
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from config import CLAIM_WORKERS, CASCADE_ENABLED, CASCADE_FIRST_K, CASCADE_CONFIDENCE
+from utils.evidence_retrieval import web_retriever
+from utils.evidence_planner import EvidencePlan
+from records import Claim, Evidence, Verification, ClaimResult
+from utils.knowledge_graph import extract_texts_from_kg_results
+from utils.profiling import timed, submit_with_context
+
+logger = logging.getLogger(__name__)
+
+class FactChecker:
+    """
+    Runs claim detection, evidence retrieval and verification with the shared models.
+    Claims of a request are processed concurrently on a thread pool. With the cascade
+    enabled, the expensive stages are skipped once the most relevant evidences agree.
+    """
+    def __init__(self, claim_detector, claim_verifier, similarity_calculator, relevance_filter,
+                 multi_hop_reasoner, qa_model, max_workers=CLAIM_WORKERS, cascade=CASCADE_ENABLED,
+                 cascade_first_k=CASCADE_FIRST_K, cascade_confidence=CASCADE_CONFIDENCE, verdict_store=None,
+                 retriever=None):
+        self.claim_detector = claim_detector
+        self.claim_verifier = claim_verifier
+        self.similarity_calculator = similarity_calculator
+        self.relevance_filter = relevance_filter
+        self.multi_hop_reasoner = multi_hop_reasoner
+        self.qa_model = qa_model
+        self.verdict_store = verdict_store
+        self.retriever = retriever if retriever is not None else web_retriever
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='claim')
+        self.cascade = cascade
+        self.cascade_first_k = cascade_first_k
+        self.cascade_confidence = cascade_confidence
+        self.cascade_counters = {'claims': 0, 'early_exits': 0, 'qa_skipped': 0, 'nli_skipped': 0,
+                                 'multi_hop_run': 0, 'multi_hop_skipped': 0}
+        self.counters_lock = threading.Lock()
+
+    def reopen(self):
+        """
+        Replaces the claim pool and counter lock in a process forked from the one that created them.
+        The cascade counters restart at zero, as the parent keeps reporting its own.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='claim')
+        self.counters_lock = threading.Lock()
+        self.cascade_counters = dict.fromkeys(self.cascade_counters, 0)
+
+    def detect_claims(self, sentences):
+        return self.detect_claims_many([sentences])[0]
+
+    def detect_claims_many(self, sentence_lists):
+        """
+        Runs claim detection over the sentences of several documents in one batch.
+        Returns the claims of each document.
+        """
+        with timed('detection'):
+            predictions = iter(self.claim_detector.predict_batch([s for sentences in sentence_lists for s in sentences]))
+        claim_lists = []
+        for sentences in sentence_lists:
+            claims = []
+            for sentence, (predicted_class, predicted_label, confidence) in zip(sentences, predictions):
+                logger.debug("Sentence of %d chars: class %s, label %s, confidence %.3f",
+                             len(sentence), predicted_class, predicted_label, confidence)
+                if predicted_class == 1:
+                    claims.append(Claim(sentence, confidence, predicted_label))
+            claim_lists.append(claims)
+        return claim_lists
+
+    def plan_evidence(self, claims):
+        """
+        Starts the web searches and the knowledge graph lookup of all claims at once;
+        pages found by several claims are fetched once.
+        """
+        return EvidencePlan(self.retriever, self.relevance_filter).start([claim.sentence for claim in claims])
+
+    def gather_evidence(self, claim, plan=None):
+        """
+        Retrieves and filters web and knowledge graph evidence for a claim.
+        Returns a list of Evidence with web evidence ordered by similarity,
+        or None when the search returned nothing.
+        """
+        logger.debug("Retrieving evidence for claim of %d chars", len(claim.sentence))
+        # The plan runs the knowledge graph lookup alongside web evidence retrieval
+        if plan is None:
+            plan = self.plan_evidence([claim])
+        # The top passages of each page with content, shared with the other claims of the request
+        documents = plan.evidence(claim.sentence, top_k=9)
+        if documents is None:
+            logger.info("No evidence found for claim of %d chars", len(claim.sentence))
+            return None  # Skip if no evidence found
+
+        web_evidences = []  # (similarity, text, url)
+        with timed('relevance'):
+            # Compute similarity between claim and extracted passages
+            similarity_scores = self.similarity_calculator.compute_similarities(claim.sentence, [text for _, text in documents])
+
+        threshold = 0.3  # Adjust as needed
+        for (url, relevant_text), similarity_score in zip(documents, similarity_scores):
+            if similarity_score >= threshold:
+                web_evidences.append((similarity_score, relevant_text, url))
+            else:
+                logger.debug("Evidence not relevant enough (similarity: %.3f)", similarity_score)
+
+        # Most relevant web evidence first, so the cascade looks at it before the rest
+        web_evidences.sort(key=lambda evidence: evidence[0], reverse=True)
+        evidences = [Evidence(text, url) for _, text, url in web_evidences]
+
+        # Knowledge Graph Query
+        kg_results = plan.knowledge_results(claim.sentence)
+        kg_evidences = extract_texts_from_kg_results(kg_results)
+        # KG results have no page URL; the Wikidata item URL is used as their source
+        for text, result in zip(kg_evidences, kg_results.get("results", {}).get("bindings", [])):
+            evidences.append(Evidence(text, result["item"]["value"]))
+
+        return evidences
+
+    def extract_answers(self, claim, evidences):
+        """
+        Runs the QA model over the evidences and returns the pending (not yet verified) Verifications.
+        """
+        pending_verifications = []
+        with timed('qa'):
+            answers = self.qa_model.extract_answers(claim.sentence, [evidence.text for evidence in evidences])
+        for evidence, (answer, score) in zip(evidences, answers):
+            if score > 0.01:  # Threshold for accepting the answer
+                pending_verifications.append(Verification(evidence, answer))
+            else:
+                logger.debug("No relevant answer found in evidence with score %.4f", score)
+        return pending_verifications
+
+    def reason(self, claim, evidences):
+        with timed('multi_hop'):
+            answer = self.multi_hop_reasoner.reason_over_evidence(claim.sentence, [evidence.text for evidence in evidences])
+        # Include all evidence sources used in multi-hop reasoning
+        return Verification(Evidence(answer, [evidence.source for evidence in evidences]), answer)
+
+    def verify(self, claim, pending_verifications):
+        """
+        Verifies every pending (claim, answer) pair in a single batched pass, filling in their labels.
+        """
+        with timed('nli'):
+            verification_results = self.claim_verifier.verify_batch([(claim.sentence, v.answer) for v in pending_verifications])
+        for verification, (predicted_label, confidence) in zip(pending_verifications, verification_results):
+            logger.debug("Verification result - label: %s, confidence: %.3f", predicted_label, confidence)
+            verification.label = predicted_label
+            verification.confidence = confidence
+        return pending_verifications
+
+    def verify_claim(self, claim, plan=None):
+        """
+        Gathers evidence for a claim and verifies it. Returns the list of verifications.
+        """
+        evidences = self.gather_evidence(claim, plan)
+        if not evidences:
+            if evidences is not None:
+                logger.info("No relevant evidences found for claim of %d chars", len(claim.sentence))
+            return []
+
+        if self.cascade:
+            return self.verify_cascade(claim, evidences)
+
+        # Use QA Model for Fact Extraction over all evidences of the claim at once
+        pending_verifications = self.extract_answers(claim, evidences)
+        # Use Multi-Hop Reasoning for complex claims
+        if len(evidences) > 1:
+            pending_verifications.append(self.reason(claim, evidences))
+        return self.verify(claim, pending_verifications)
+
+    def verify_cascade(self, claim, evidences):
+        """
+        Verifies the most relevant evidences first and stops once they agree with enough
+        confidence. Multi-hop reasoning only runs when the single-evidence verdicts conflict.
+        """
+        first_k = self.cascade_first_k
+        verifications = self.verify(claim, self.extract_answers(claim, evidences[:first_k]))
+        remaining = len(evidences) - first_k
+
+        labels = {v.label for v in verifications}
+        confident = (len(labels) == 1 and
+                     sum(v.confidence for v in verifications) / len(verifications) >= self.cascade_confidence)
+        if confident and remaining > 0:
+            self._count('early_exits')
+            self._count('qa_skipped', remaining)
+            self._count('nli_skipped', remaining)
+        elif remaining > 0:
+            verifications.extend(self.verify(claim, self.extract_answers(claim, evidences[first_k:])))
+            labels = {v.label for v in verifications}
+
+        # Only fall back to multi-hop reasoning when the single evidences disagree or gave no answer
+        if len(evidences) > 1:
+            if len(labels) > 1 or not verifications:
+                self._count('multi_hop_run')
+                verifications.extend(self.verify(claim, [self.reason(claim, evidences)]))
+            else:
+                self._count('multi_hop_skipped')
+        self._count('claims')
+        return verifications
+
+    def _count(self, name, amount=1):
+        with self.counters_lock:
+            self.cascade_counters[name] += amount
+
+    def cascade_stats(self):
+        with self.counters_lock:
+            return dict(self.cascade_counters)
+
+    def aggregate(self, claim, verifications):
+        """
+        Combines the verifications of a claim in a single pass. Returns its ClaimResult, or None.
+        """
+        if not verifications:
+            return None
+        with timed('aggregation'):
+            label_counts = {}
+            total_confidence = 0.0
+            evidence_links = {}  # Ordered set of the sources, multi-hop ones flattened
+            for verification in verifications:
+                label_counts[verification.label] = label_counts.get(verification.label, 0) + 1
+                total_confidence += verification.confidence
+                for source in verification.evidence.sources():
+                    evidence_links[source] = None
+            # Simple majority voting
+            final_label = max(label_counts, key=label_counts.get)
+            return ClaimResult(claim.sentence, final_label, total_confidence / len(verifications), list(evidence_links))
+
+    def check_claims(self, claims):
+        """
+        Checks all claims concurrently; their model calls share batches through the serving layer.
+        Returns the aggregated results of the claims that could be verified.
+        """
+        futures = self.submit_claims(claims)
+        return [result for result in (future.result() for future in futures) if result is not None]
+
+    def submit_claims(self, claims):
+        """
+        Reuses stored verdicts, plans the evidence of the other claims together and submits
+        them to the claim pool. Returns {future: claim} in claim order.
+        """
+        cached = [self.cached_verdict(claim) for claim in claims]
+        plan = self.plan_evidence([claim for claim, result in zip(claims, cached) if result is None])
+        futures = {}
+        for claim, result in zip(claims, cached):
+            if result is None:
+                future = submit_with_context(self.executor, self.check_claim, claim, plan)
+            else:
+                future = Future()
+                future.set_result(result)
+            futures[future] = claim
+        return futures
+
+    def cached_verdict(self, claim):
+        """
+        Returns the stored verdict of a near-duplicate claim, or None.
+        """
+        if self.verdict_store is None:
+            return None
+        cached = self.verdict_store.lookup(claim.sentence)
+        if cached is None:
+            return None
+        logger.debug("Reusing verdict of a similar claim (similarity %.3f)", cached['cached']['similarity'])
+        cached['claim'] = claim.sentence
+        return ClaimResult.from_dict(cached)
+
+    def check_claim(self, claim, plan=None):
+        """
+        Verifies a single claim end to end. Returns its aggregated result, or None.
+        """
+        result = self.aggregate(claim, self.verify_claim(claim, plan))
+        if result is not None and self.verdict_store is not None:
+            self.verdict_store.add(claim.sentence, result.to_dict())
+        return result
+
+    def iter_claim_results(self, claims):
+        """
+        Checks all claims concurrently and yields (claim, result) as each claim finishes.
+        """
+        futures = self.submit_claims(claims)
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,69 @@
+# backend/records.py
+
+class Claim:
+    """
+    A sentence the claim detector flagged as check-worthy.
+    """
+    __slots__ = ('sentence', 'confidence', 'label')
+
+    def __init__(self, sentence, confidence, label):
+        self.sentence = sentence
+        self.confidence = confidence
+        self.label = label
+
+    def to_dict(self):
+        return {'sentence': self.sentence, 'confidence': self.confidence, 'label': self.label}
+
+class Evidence:
+    """
+    A piece of evidence and where it came from: a URL, a Wikidata item, or for
+    multi-hop answers the list of every source reasoned over.
+    """
+    __slots__ = ('text', 'source')
+
+    def __init__(self, text, source):
+        self.text = text
+        self.source = source
+
+    def sources(self):
+        return self.source if isinstance(self.source, list) else [self.source]
+
+class Verification:
+    """
+    The answer drawn from one evidence and, once verified, the verifier's label for it.
+    """
+    __slots__ = ('evidence', 'answer', 'label', 'confidence')
+
+    def __init__(self, evidence, answer, label=None, confidence=None):
+        self.evidence = evidence
+        self.answer = answer
+        self.label = label
+        self.confidence = confidence
+
+class ClaimResult:
+    """
+    The aggregated verdict of a claim, as returned by /analyze.
+    """
+    __slots__ = ('claim', 'classification', 'confidence', 'evidence_links', 'cached')
+
+    def __init__(self, claim, classification, confidence, evidence_links, cached=None):
+        self.claim = claim
+        self.classification = classification
+        self.confidence = confidence
+        self.evidence_links = evidence_links
+        self.cached = cached
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['claim'], data['classification'], data['confidence'], data['evidence_links'], data.get('cached'))
+
+    def to_dict(self):
+        result = {
+            'claim': self.claim,
+            'classification': self.classification,
+            'confidence': self.confidence,
+            'evidence_links': self.evidence_links
+        }
+        if self.cached is not None:
+            result['cached'] = self.cached
+        return result
@@ -0,0 +1,67 @@
+# backend/tests/test_html_extraction.py
+
+from utils.html_extraction import iter_paragraphs
+
+WIKIPEDIA_PAGE = b"""<!DOCTYPE html>
+<html class="client-nojs vector-feature-language-in-header-enabled vector-feature-main-menu-pinned-disabled
+             vector-feature-sticky-header-disabled vector-toc-available" lang="en" dir="ltr">
+<head><title>Eiffel Tower - Wikipedia</title></head>
+<body class="skin-vector skin-vector-search-vue mediawiki ltr sitedir-ltr mw-hide-empty-elt ns-0 page-Eiffel_Tower">
+<div class="vector-header-container">
+  <header class="vector-header mw-header"><p>Main menu move to sidebar hide navigation links here</p></header>
+</div>
+<div class="mw-page-container">
+  <div id="vector-main-menu" class="vector-menu"><p>Main page Contents Current events Random article About</p></div>
+  <main id="content" class="mw-body">
+    <div id="mw-content-text" class="mw-body-content">
+      <div class="mw-content-ltr mw-parser-output">
+        <p>The Eiffel Tower is a wrought-iron lattice tower on the Champ de Mars in Paris, France.</p>
+        <p>It is named after the engineer Gustave Eiffel, whose company designed and built the tower.</p>
+      </div>
+    </div>
+  </main>
+</div>
+<footer id="footer" class="mw-footer"><p>This page was last edited on 1 January 2024, at 12:00 (UTC).</p></footer>
+</body>
+</html>"""
+
+WORDPRESS_PAGE = b"""<!DOCTYPE html>
+<html lang="en-US" class="no-js has-navigation-menu">
+<body class="post-template-default single single-post postid-42 has-sidebar header-sticky wp-embed-responsive">
+<div id="page" class="site">
+  <div id="masthead" class="site-header"><p>My Travel Blog - stories from the road and beyond</p></div>
+  <div id="content" class="site-content">
+    <article id="post-42" class="post-42 post type-post status-publish has-post-thumbnail">
+      <div class="entry-content">
+        <p>The Great Wall of China is a series of fortifications built across the historical northern borders.</p>
+        <p>Several walls were built from as early as the 7th century BC by various states.</p>
+      </div>
+      <div class="sharedaddy sd-sharing-enabled share-buttons"><p>Share this: Twitter Facebook LinkedIn Email</p></div>
+    </article>
+    <div id="secondary" class="widget-area sidebar" role="complementary"><p>Recent posts from the last few weeks of travel</p></div>
+    <div id="comments" class="comments-area"><p>Leave a reply, your email address will not be published.</p></div>
+  </div>
+</div>
+</body>
+</html>"""
+
+def test_wikipedia_root_classes_do_not_hide_content():
+    assert list(iter_paragraphs([WIKIPEDIA_PAGE])) == [
+        'The Eiffel Tower is a wrought-iron lattice tower on the Champ de Mars in Paris, France.',
+        'It is named after the engineer Gustave Eiffel, whose company designed and built the tower.',
+    ]
+
+def test_wordpress_root_classes_do_not_hide_content():
+    assert list(iter_paragraphs([WORDPRESS_PAGE])) == [
+        'The Great Wall of China is a series of fortifications built across the historical northern borders.',
+        'Several walls were built from as early as the 7th century BC by various states.',
+    ]
+
+def test_paragraphs_split_across_chunks():
+    chunks = [WORDPRESS_PAGE[start:start + 97] for start in range(0, len(WORDPRESS_PAGE), 97)]
+    assert list(iter_paragraphs(chunks)) == list(iter_paragraphs([WORDPRESS_PAGE]))
+
+def test_hint_words_inside_a_token_do_not_match():
+    page = (b'<html><body><div class="unshared-notes navigator-free">'
+            b'<p>Paragraph text that is long enough to be kept by the extractor.</p></div></body></html>')
+    assert list(iter_paragraphs([page])) == ['Paragraph text that is long enough to be kept by the extractor.']
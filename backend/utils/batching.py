@@ -0,0 +1,84 @@
+# backend/utils/batching.py
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from utils.metrics import Histogram
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+QUEUE_WAIT_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+class MicroBatcher:
+    """
+    Collects single inputs from any number of threads into one queue and calls
+    batch_fn(inputs) once max_batch_size inputs are waiting or the oldest has
+    waited max_wait_ms. Each caller gets its own output back through a Future.
+    """
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=10, name='batch'):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self.start_lock = threading.Lock()
+        self.pid = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A thread of the parent may have held the lock when it forked
+        self.start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # The worker thread is started lazily, and again in any forked child process
+        pid = os.getpid()
+        if self.pid == pid:
+            return
+        with self.start_lock:
+            if self.pid == pid:
+                return
+            self.queue = queue.Queue()
+            threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True).start()
+            self.pid = pid
+
+    def submit(self, item):
+        self._ensure_started()
+        future = Future()
+        self.queue.put((item, future, time.monotonic()))
+        return future
+
+    def map(self, items):
+        futures = [self.submit(item) for item in items]
+        return [future.result() for future in futures]
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = batch[0][2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    batch.append(self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            started = time.monotonic()
+            for _, _, enqueued in batch:
+                self.queue_wait_ms.observe((started - enqueued) * 1000)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                outputs = self.batch_fn([item for item, _, _ in batch])
+                if len(outputs) != len(batch):
+                    raise ValueError(f"{self.name}: batch_fn returned {len(outputs)} outputs for {len(batch)} inputs")
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), output in zip(batch, outputs):
+                future.set_result(output)
+
+    def stats(self):
+        return {'batch_size': self.batch_sizes.snapshot(), 'queue_wait_ms': self.queue_wait_ms.snapshot()}
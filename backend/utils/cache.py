@@ -0,0 +1,175 @@
+# backend/utils/cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import CACHE_PATH, CACHE_MAX_BYTES, CACHE_TTL, CACHE_OFFLINE
+
+ACCESS_FLUSH_SIZE = 256  # Buffered access times written in one go
+ACCESS_FLUSH_SECONDS = 30.0
+
+class DiskCache:
+    """
+    Content-addressed key-value cache stored in SQLite, with a TTL per entry
+    and least-recently-used eviction once the total size exceeds max_bytes.
+    Values are JSON-serialisable objects grouped by namespace.
+
+    Reads never write: access times are buffered in memory and flushed with the next
+    write, or once enough have piled up. The total size is kept as a running count.
+    """
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL, offline=CACHE_OFFLINE):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = self._connect()
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        self.conn.commit()
+        self._reset_state()
+
+    def _reset_state(self):
+        self.accessed = {}
+        self.accessed_since = time.monotonic()
+        self.total_bytes = self._sum_sizes()
+
+    def _sum_sizes(self):
+        return self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def _connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def reopen(self):
+        """
+        Opens a fresh connection, e.g. in a process forked from the one that created the cache.
+        """
+        self.lock = threading.Lock()
+        self.conn = self._connect()
+        self._reset_state()
+
+    @staticmethod
+    def make_key(namespace, key):
+        return hashlib.sha256(f"{namespace}\0{key}".encode('utf-8')).hexdigest()
+
+    def _count(self, namespace, outcome):
+        counters = self.counters.setdefault(namespace, {'hits': 0, 'misses': 0, 'stale': 0})
+        counters[outcome] += 1
+
+    def lookup(self, namespace, key):
+        """
+        Returns (value, is_fresh), or (None, False) when the key is absent.
+        Expired entries are still returned so callers can revalidate them.
+        """
+        digest = self.make_key(namespace, key)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute('SELECT value, expires FROM entries WHERE key = ?', (digest,)).fetchone()
+            if row is None:
+                self._count(namespace, 'misses')
+                return None, False
+            self.accessed[digest] = now
+            if len(self.accessed) >= ACCESS_FLUSH_SIZE or time.monotonic() - self.accessed_since >= ACCESS_FLUSH_SECONDS:
+                self._flush_accessed()
+                self.conn.commit()
+            # Offline runs never expire anything
+            is_fresh = self.offline or row[1] >= now
+            self._count(namespace, 'hits' if is_fresh else 'stale')
+        return json.loads(row[0]), is_fresh
+
+    def get(self, namespace, key):
+        value, is_fresh = self.lookup(namespace, key)
+        return value if is_fresh else None
+
+    def set(self, namespace, key, value, ttl=None):
+        if self.offline:
+            return
+        blob = json.dumps(value).encode('utf-8')
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        digest = self.make_key(namespace, key)
+        with self.lock:
+            previous = self.conn.execute('SELECT size FROM entries WHERE key = ?', (digest,)).fetchone()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO entries (key, namespace, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?, ?)',
+                (digest, namespace, blob, len(blob), expires, now)
+            )
+            self.accessed.pop(digest, None)
+            self.total_bytes += len(blob) - (previous[0] if previous else 0)
+            self._flush_accessed()
+            self._evict()
+            self.conn.commit()
+
+    def touch(self, namespace, key, ttl=None):
+        """
+        Marks an entry as fresh again, e.g. after a 304 Not Modified.
+        """
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.conn.execute('UPDATE entries SET expires = ? WHERE key = ?', (expires, self.make_key(namespace, key)))
+            self.conn.commit()
+
+    def _flush_accessed(self):
+        # Callers hold self.lock and commit
+        if self.accessed:
+            self.conn.executemany('UPDATE entries SET accessed = ? WHERE key = ?',
+                                  [(accessed, digest) for digest, accessed in self.accessed.items()])
+            self.accessed = {}
+        self.accessed_since = time.monotonic()
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        # Other processes (forked job workers) write to the same file, so recount before evicting
+        total = self.total_bytes = self._sum_sizes()
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under the limit
+        freed = 0
+        victims = []
+        for digest, size in self.conn.execute('SELECT key, size FROM entries ORDER BY accessed ASC'):
+            victims.append((digest,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self.conn.executemany('DELETE FROM entries WHERE key = ?', victims)
+        self.total_bytes = total - freed
+
+    def iter_values(self, namespace):
+        """
+        Yields every value stored in a namespace, expired or not.
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT value FROM entries WHERE namespace = ?', (namespace,)).fetchall()
+        for (blob,) in rows:
+            yield json.loads(blob)
+
+    def stats(self):
+        with self.lock:
+            rows = self.conn.execute('SELECT namespace, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY namespace').fetchall()
+            counters = {namespace: dict(values) for namespace, values in self.counters.items()}
+        sizes = {namespace: {'entries': count, 'bytes': size} for namespace, count, size in rows}
+        return {
+            namespace: {**counters.get(namespace, {'hits': 0, 'misses': 0, 'stale': 0}), **sizes.get(namespace, {'entries': 0, 'bytes': 0})}
+            for namespace in set(counters) | set(sizes)
+        }
+
+def normalize_query(text):
+    return ' '.join(text.lower().split())
+
+disk_cache = DiskCache()
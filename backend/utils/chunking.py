@@ -0,0 +1,114 @@
+# backend/utils/chunking.py
+
+import math
+import re
+from config import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+class ChunkedDocument:
+    """
+    A document as a list of sentences and the (start, end) sentence ranges of its passages.
+    Neighbouring passages share their boundary sentences when those fit in the overlap.
+    """
+    __slots__ = ('units', 'spans')
+
+    def __init__(self, units, spans):
+        self.units = units
+        self.spans = spans
+
+    def __len__(self):
+        return len(self.spans)
+
+    def passages(self):
+        return [' '.join(self.units[start:end]) for start, end in self.spans]
+
+    def join(self, order):
+        """
+        Joins the passages in the given order, skipping sentences an earlier passage already included.
+        """
+        seen = set()
+        text = []
+        for i in order:
+            start, end = self.spans[i]
+            for unit in range(start, end):
+                if unit not in seen:
+                    seen.add(unit)
+                    text.append(self.units[unit])
+        return ' '.join(text)
+
+class PassageChunker:
+    """
+    Splits text into overlapping passages of at most max_tokens tokens, breaking
+    between sentences. Tokens are counted with the embedding model's tokenizer when
+    given, so passages are never truncated by the encoder.
+    """
+    def __init__(self, tokenizer=None, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+        self.tokenizer = _independent_tokenizer(tokenizer)
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def count_tokens(self, texts):
+        if self.tokenizer is None:
+            return [len(WORD_PATTERN.findall(text)) for text in texts]
+        return [len(encoding.ids) for encoding in self.tokenizer.encode_batch(texts, add_special_tokens=False)]
+
+    def _units(self, paragraphs):
+        units = []
+        for paragraph in paragraphs:
+            units.extend(unit for unit in SENTENCE_BOUNDARY.split(paragraph.strip()) if unit)
+        lengths = self.count_tokens(units) if units else []
+
+        # Sentences longer than a whole passage are cut into word windows of about max_tokens
+        bounded_units, bounded_lengths = [], []
+        for unit, length in zip(units, lengths):
+            if length <= self.max_tokens:
+                bounded_units.append(unit)
+                bounded_lengths.append(length)
+                continue
+            words = unit.split()
+            pieces = math.ceil(length / self.max_tokens)
+            size = math.ceil(len(words) / pieces)
+            for start in range(0, len(words), size):
+                bounded_units.append(' '.join(words[start:start + size]))
+                bounded_lengths.append(math.ceil(length * min(size, len(words) - start) / len(words)))
+        return bounded_units, bounded_lengths
+
+    def chunk(self, paragraphs):
+        """
+        Chunks an iterable of paragraphs, e.g. a page that is still streaming in.
+        """
+        units, lengths = self._units(paragraphs)
+        spans = []
+        start = 0
+        while start < len(units):
+            end, total = start, 0
+            while end < len(units) and (end == start or total + lengths[end] <= self.max_tokens):
+                total += lengths[end]
+                end += 1
+            spans.append((start, end))
+            if end == len(units):
+                break
+            # Step back so the next passage repeats up to overlap_tokens from the end of this one
+            next_start, carried = end, 0
+            while next_start - 1 > start and carried + lengths[next_start - 1] <= self.overlap_tokens:
+                next_start -= 1
+                carried += lengths[next_start]
+            start = next_start
+        return ChunkedDocument(units, spans)
+
+    def chunk_text(self, text):
+        return self.chunk(text.split('\n'))
+
+def _independent_tokenizer(tokenizer):
+    # A private copy of a fast tokenizer's Rust backend with truncation and padding off: chunking
+    # runs on fetch threads while the encoder reconfigures the shared one for its own calls
+    backend = getattr(tokenizer, 'backend_tokenizer', None)
+    if backend is None:
+        return None
+    from tokenizers import Tokenizer
+    copy = Tokenizer.from_str(backend.to_str())
+    copy.no_truncation()
+    copy.no_padding()
+    return copy
@@ -0,0 +1,85 @@
+# backend/utils/embeddings.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+class EmbeddingService:
+    """
+    Wraps a SentenceTransformer with an LRU cache keyed by text hash.
+    All texts missing from the cache are encoded in a single batched call.
+    Embeddings are L2-normalised, so a dot product is the cosine similarity,
+    and cached as float16 to halve their memory.
+    """
+    def __init__(self, model, cache_size=10000, batch_size=64):
+        self.model = model
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A thread of the parent may have held the lock when it forked
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(text):
+        return hashlib.sha1(text.encode('utf-8')).digest()
+
+    def encode(self, texts, dtype=np.float32):
+        """
+        Returns a (len(texts), dim) array of normalised embeddings.
+        """
+        keys = [self._key(text) for text in texts]
+        vectors = [None] * len(texts)
+        missing = {}
+        with self.lock:
+            for i, key in enumerate(keys):
+                vector = self.cache.get(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self.cache.move_to_end(key)
+                    vectors[i] = vector
+            self.hits += len(texts) - sum(len(indices) for indices in missing.values())
+            self.misses += len(missing)
+
+        if missing:
+            missing_texts = [texts[indices[0]] for indices in missing.values()]
+            encoded = self.model.encode(missing_texts, batch_size=self.batch_size, convert_to_numpy=True,
+                                        normalize_embeddings=True, show_progress_bar=False).astype(np.float16)
+            with self.lock:
+                for (key, indices), vector in zip(missing.items(), encoded):
+                    for i in indices:
+                        vectors[i] = vector
+                    self.cache[key] = vector
+                    self.cache.move_to_end(key)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        if not vectors:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=dtype)
+        return np.vstack(vectors).astype(dtype, copy=False)
+
+    def encode_one(self, text):
+        return self.encode([text])[0]
+
+    def scores(self, query, texts):
+        """
+        Cosine similarity of the query against every text, as one matrix-vector product.
+        """
+        return self.encode(texts) @ self.encode_one(query)
+
+def top_k_indices(scores, k):
+    """
+    Indices of the k highest scores in descending order, using a partial sort.
+    """
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
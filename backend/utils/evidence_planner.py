@@ -0,0 +1,196 @@
+# backend/utils/evidence_planner.py
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+import numpy as np
+from config import HTTP_DEADLINE, HTTP_PLAN_MAX_FETCHES, HTTP_MAX_PER_HOST
+from utils.embeddings import top_k_indices
+from utils.http_client import host_key, submit
+from utils.knowledge_graph import EMPTY_RESULTS, query_claims_async
+from utils.profiling import timed
+
+logger = logging.getLogger(__name__)
+
+class EvidencePlan:
+    """
+    Web evidence for all claims of one request. Every claim is searched at once, each
+    result URL is fetched, chunked and passage-embedded once however many claims found
+    it, and the embedded passages are then routed to every claim that needs them.
+    Claims are served as soon as their own pages are in, while other pages still download.
+    The knowledge graph entities of the claims are resolved alongside, in one lookup.
+
+    At most max_fetches pages of a plan are on the shared fetch pool at a time, so one
+    large request cannot queue the pool up for every other one, and at most max_per_host
+    of them to the same host, so the others wait in the plan for their turn rather than
+    for a connection slot. Each page gets the deadline from the moment its fetch starts.
+    """
+    def __init__(self, retriever, relevance_filter, deadline=HTTP_DEADLINE, max_fetches=HTTP_PLAN_MAX_FETCHES,
+                 max_per_host=HTTP_MAX_PER_HOST):
+        self.retriever = retriever
+        self.relevance_filter = relevance_filter
+        self.deadline = deadline
+        self.max_fetches = max_fetches
+        self.max_per_host = max_per_host
+        self.searches = {}
+        self.pages = {}
+        self.fetch_started = {}
+        self.queued = deque()
+        self.in_flight = 0
+        self.host_fetches = {}  # Host -> pages of the plan being fetched from it
+        self.knowledge = {}
+        self.lock = threading.Lock()
+
+    def start(self, claims):
+        """
+        Starts the search of every claim, and the knowledge graph lookup of all of them;
+        pages are scheduled as soon as each search returns.
+        """
+        with self.lock:
+            new_claims = [claim for claim in dict.fromkeys(claims) if claim not in self.searches]
+            for claim in new_claims:
+                self.searches[claim] = submit(self.retriever.search, claim)
+            if new_claims:
+                lookup = query_claims_async(new_claims)
+                for claim in new_claims:
+                    self.knowledge[claim] = lookup
+        # Outside the lock: a search that already finished runs its callback right away
+        for claim in new_claims:
+            self.searches[claim].add_done_callback(self._schedule_pages)
+        return self
+
+    def _schedule_pages(self, search):
+        if search.cancelled() or search.exception() is not None:
+            return
+        for url in search.result():
+            self._page(url)
+
+    def _page(self, url):
+        with self.lock:
+            if url not in self.pages:
+                self.pages[url] = Future()
+                self.queued.append(url)
+            page = self.pages[url]
+        self._dispatch()
+        return page
+
+    def _dispatch(self):
+        # Hands queued pages to the fetch pool while the plan has fewer than max_fetches there,
+        # skipping over those whose host already has max_per_host of the plan's fetches
+        with self.lock:
+            waiting = deque()
+            while self.queued and self.in_flight < self.max_fetches:
+                url = self.queued.popleft()
+                if self.pages[url].cancelled():
+                    continue
+                host = host_key(url)
+                if self.host_fetches.get(host, 0) >= self.max_per_host:
+                    waiting.append(url)
+                    continue
+                self.in_flight += 1
+                self.host_fetches[host] = self.host_fetches.get(host, 0) + 1
+                submit(self._run_page, url)
+            waiting.extend(self.queued)
+            self.queued = waiting
+
+    def _run_page(self, url):
+        page = self.pages[url]
+        try:
+            # A page cancelled while it waited in the pool is skipped
+            if page.set_running_or_notify_cancel():
+                self.fetch_started[url] = time.monotonic()
+                try:
+                    page.set_result(self._load_page(url))
+                except Exception as e:
+                    page.set_exception(e)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.host_fetches[host_key(url)] -= 1
+            self._dispatch()
+
+    def _load_page(self, url):
+        # Chunk the page while it streams in, then embed its passages once for every claim
+        document = self.retriever.fetch(url, extract=self.relevance_filter.chunk_paragraphs)
+        if not document:
+            return None
+        with timed('relevance'):
+            vectors = self.relevance_filter.embeddings.encode(document.passages(), dtype=np.float16)
+        return document, vectors
+
+    def knowledge_results(self, claim):
+        """
+        Waits for the knowledge graph lookup and returns the claim's SPARQL JSON results.
+        """
+        self.start([claim])
+        try:
+            return self.knowledge[claim].result()[claim]
+        except Exception as e:
+            logger.warning("Knowledge graph lookup failed: %s", e)
+            return EMPTY_RESULTS
+
+    def evidence(self, claim, top_k=9):
+        """
+        Waits for the claim's pages and returns [(url, relevant_text)] for those with content,
+        in search order, or None when the search returned nothing. A page is dropped once the
+        deadline has passed since its fetch started, or, if it has not started by then, since
+        the claim began waiting; pages not started are cancelled.
+        """
+        self.start([claim])
+        try:
+            urls = self.searches[claim].result()
+        except Exception as e:
+            logger.warning("Search failed: %s", e)
+            return None
+        if not urls:
+            return None
+
+        futures = {url: self._page(url) for url in urls}
+        waiting_since = time.monotonic()
+        pending = dict(futures)
+        dropped = []
+        while pending:
+            now = time.monotonic()
+            limits = {}
+            for url, future in list(pending.items()):
+                limit = self.fetch_started.get(url, waiting_since) + self.deadline
+                if future.done():
+                    del pending[url]
+                elif limit <= now and (future.cancel() or url in self.fetch_started):
+                    # Cancelled if it never started; a running fetch is left to its own timeouts
+                    del pending[url]
+                    dropped.append(url)
+                else:
+                    limits[url] = limit
+            if pending:
+                wait(pending.values(), timeout=max(0.0, min(limits.values()) - now), return_when=FIRST_COMPLETED)
+        if dropped:
+            logger.warning("Fetch deadline of %ss exceeded, dropping %d URLs: %s", self.deadline, len(dropped), dropped)
+
+        pages = []
+        for url, future in futures.items():
+            if url in dropped or future.cancelled():
+                continue
+            try:
+                page = future.result()
+            except Exception as e:
+                logger.warning("Error loading %s: %s", url, e)
+                continue
+            if page is not None:
+                pages.append((url, page))
+        if not pages:
+            return []
+
+        # Score the claim against the passages of all its pages in one matrix product
+        with timed('relevance'):
+            claim_vector = self.relevance_filter.embeddings.encode_one(claim)
+            scores = np.concatenate([vectors for _, (_, vectors) in pages]) @ claim_vector
+            evidence = []
+            offset = 0
+            for url, (document, _) in pages:
+                page_scores = scores[offset:offset + len(document)]
+                offset += len(document)
+                evidence.append((url, document.join(top_k_indices(page_scores, top_k))))
+        return evidence
@@ -1,20 +1,68 @@
-import os
 from googleapiclient.discovery import build
-from dotenv import load_dotenv
-from utils.text_retrieval import retrieve_post_text
+from config import GOOGLE_API_KEY, SEARCH_ENGINE_ID, SEARCH_API_ENDPOINT
+from utils.text_retrieval import retrieve_post_text, iter_post_paragraphs
+from utils.http_client import map_as_completed
+from utils.cache import disk_cache, normalize_query
+from utils.profiling import timed
 
-load_dotenv()
+_service = None
 
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-GOOGLE_CSE_ID = os.getenv('GOOGLE_CSE_ID')
+def _get_service():
+    global _service
+    if _service is None:
+        client_options = {'api_endpoint': SEARCH_API_ENDPOINT} if SEARCH_API_ENDPOINT else None
+        _service = build("customsearch", "v1", developerKey=GOOGLE_API_KEY, cache_discovery=False,
+                         client_options=client_options)
+    return _service
+
+def search_urls(claim, num=5):
+    cache_key = f"{normalize_query(claim)}|{num}"
+    urls = disk_cache.get('cse', cache_key)
+    if urls is not None:
+        return urls
+    if disk_cache.offline:
+        return []
+    res = _get_service().cse().list(q=claim, cx=SEARCH_ENGINE_ID, num=num).execute()
+    urls = [item['link'] for item in res.get('items', [])]
+    disk_cache.set('cse', cache_key, urls)
+    return urls
+
+class WebRetriever:
+    """
+    Evidence from a live Google Custom Search, with each result page fetched concurrently.
+    """
+    def __init__(self, num=5):
+        self.num = num
+
+    def iter_evidence(self, claim, extract=None):
+        """
+        Yields {'url', 'content'} for each search result as soon as its page has been fetched.
+        When given, extract(paragraphs) runs on the fetch thread while the page is still
+        streaming in, and its return value is used as the content instead of the full text.
+        """
+        urls = self.search(claim)
+        for url, content in map_as_completed(lambda url: self.fetch(url, extract=extract), urls):
+            yield {'url': url, 'content': content}
+
+    def search(self, claim):
+        """
+        Returns the URLs of the search results for a claim.
+        """
+        with timed('search'):
+            return search_urls(claim, num=self.num)
+
+    def fetch(self, url, extract=None):
+        if extract is None:
+            return retrieve_post_text(url)
+        return extract(iter_post_paragraphs(url))
+
+    def retrieve_evidence(self, claim):
+        return list(self.iter_evidence(claim))
+
+web_retriever = WebRetriever()
+
+def iter_evidence(claim, extract=None):
+    return web_retriever.iter_evidence(claim, extract=extract)
 
 def retrieve_evidence(claim):
-    service = build("customsearch", "v1", developerKey=GOOGLE_API_KEY)
-    res = service.cse().list(q=claim, cx=GOOGLE_CSE_ID, num=5).execute()
-    evidence_list = []
-    if 'items' in res:
-        for item in res['items']:
-            url = item['link']
-            content = retrieve_post_text(url)
-            evidence_list.append({'url': url, 'content': content})
-    return evidence_list
+    return web_retriever.retrieve_evidence(claim)
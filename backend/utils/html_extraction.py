@@ -0,0 +1,88 @@
+# backend/utils/html_extraction.py
+
+import re
+from lxml import etree
+from config import HTML_MAX_PARAGRAPHS, HTML_MIN_PARAGRAPH_CHARS
+
+# Containers whose paragraphs are page chrome rather than content
+BOILERPLATE_TAGS = {'script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'button', 'figcaption'}
+# Class/id words of page chrome. A class or id token matches when it is one of these words or
+# starts or ends with one ("site-footer", "nav_links"), never on a word inside it
+BOILERPLATE_HINTS = {
+    'nav', 'navbar', 'navigation', 'menu', 'footer', 'header', 'sidebar', 'comment', 'comments', 'cookie',
+    'cookies', 'consent', 'banner', 'promo', 'share', 'sharing', 'social', 'related', 'advert', 'ads',
+    'advertisement', 'subscribe', 'newsletter', 'breadcrumb', 'breadcrumbs', 'popup', 'modal'
+}
+BOILERPLATE_ROLES = {'navigation', 'banner', 'contentinfo', 'complementary', 'menu', 'menubar', 'dialog', 'alertdialog'}
+# Page roots and content containers carry site-wide classes ("has-sidebar", "main-menu-pinned")
+# that say nothing about their own text, so hints are never applied to them
+CONTENT_TAGS = {'html', 'body', 'main', 'article'}
+TOKEN_PARTS = re.compile(r'[-_]+')
+MAX_LINK_DENSITY = 0.5
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1].lower() if isinstance(tag, str) else ''
+
+def _is_hint(token):
+    parts = [part for part in TOKEN_PARTS.split(token.lower()) if part]
+    return bool(parts) and (parts[0] in BOILERPLATE_HINTS or parts[-1] in BOILERPLATE_HINTS)
+
+def _is_boilerplate(element):
+    tag = _local_name(element.tag)
+    if tag in BOILERPLATE_TAGS:
+        return True
+    if tag in CONTENT_TAGS:
+        return False
+    if any(role in BOILERPLATE_ROLES for role in element.get('role', '').lower().split()):
+        return True
+    tokens = f"{element.get('class', '')} {element.get('id', '')}".split()
+    return any(_is_hint(token) for token in tokens)
+
+def iter_paragraphs(chunks, encoding=None, max_paragraphs=HTML_MAX_PARAGRAPHS, min_chars=HTML_MIN_PARAGRAPH_CHARS):
+    """
+    Incrementally parses HTML from an iterable of byte chunks and yields the text of
+    main-content <p> elements as soon as each one is closed. Paragraphs inside page
+    chrome (navigation, footers, cookie banners...), very short ones and link lists
+    are skipped. Parsed elements are discarded as we go, so memory stays flat.
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+    state = {'boilerplate': [], 'paragraph_depth': 0}
+    yielded = 0
+    for chunk in chunks:
+        parser.feed(chunk)
+        for text in _read_paragraphs(parser, state, min_chars):
+            yield text
+            yielded += 1
+            if yielded >= max_paragraphs:
+                return
+    parser.close()
+    for text in _read_paragraphs(parser, state, min_chars):
+        yield text
+        yielded += 1
+        if yielded >= max_paragraphs:
+            return
+
+def _read_paragraphs(parser, state, min_chars):
+    boilerplate_stack = state['boilerplate']
+    for event, element in parser.read_events():
+        tag = _local_name(element.tag)
+        if event == 'start':
+            inherited = boilerplate_stack[-1] if boilerplate_stack else False
+            boilerplate_stack.append(inherited or _is_boilerplate(element))
+            if tag == 'p':
+                state['paragraph_depth'] += 1
+            continue
+
+        in_boilerplate = boilerplate_stack.pop() if boilerplate_stack else False
+        if tag == 'p':
+            state['paragraph_depth'] -= 1
+            if not in_boilerplate:
+                text = ' '.join(''.join(element.itertext()).split())
+                link_text = sum(len(''.join(link.itertext())) for link in element.iter('a'))
+                if len(text) >= min_chars and link_text <= MAX_LINK_DENSITY * len(text):
+                    yield text
+        # Children of an open <p> are still needed for its text
+        if state['paragraph_depth'] == 0:
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
@@ -0,0 +1,138 @@
+# backend/utils/http_client.py
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from config import HTTP_POOL_SIZE, HTTP_MAX_PER_HOST, HTTP_TIMEOUT, HTTP_DEADLINE, HTTP_MAX_BYTES
+from utils.profiling import submit_with_context
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (compatible; VeriBoard/1.0)'
+
+_session = None
+_session_lock = threading.Lock()
+_host_semaphores = {}
+_host_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix='fetch')
+
+def reopen():
+    """
+    Replaces the fetch pool, session and host slots, e.g. in a process forked from the one
+    that created them: their threads and any lock held at fork time do not carry over.
+    """
+    global _session, _session_lock, _host_lock, _executor
+    _session = None
+    _session_lock = threading.Lock()
+    _host_semaphores.clear()
+    _host_lock = threading.Lock()
+    _executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix='fetch')
+
+def get_session():
+    """
+    Returns the shared keep-alive session used for every page fetch.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            _session = session
+        return _session
+
+def host_key(url):
+    """
+    The host whose connection slots a fetch of url takes.
+    """
+    return urlparse(url).netloc
+
+def _host_semaphore(url):
+    host = host_key(url)
+    with _host_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(HTTP_MAX_PER_HOST)
+        return _host_semaphores[host]
+
+@contextmanager
+def open_stream(url, timeout=HTTP_TIMEOUT, headers=None, slot_timeout=HTTP_DEADLINE):
+    """
+    Opens a streamed GET through the pooled session, holding the per-host slot until closed.
+    Raises requests.Timeout when no slot for the host frees up within slot_timeout.
+    """
+    semaphore = _host_semaphore(url)
+    if not semaphore.acquire(timeout=slot_timeout):
+        raise requests.Timeout(f"No free connection slot for {host_key(url)} after {slot_timeout}s")
+    try:
+        response = get_session().get(url, timeout=timeout, stream=True, headers=headers)
+        try:
+            yield response
+        finally:
+            response.close()
+    finally:
+        semaphore.release()
+
+class BodyReader:
+    """
+    Iterates over body chunks until max_bytes have been read or the time spent waiting
+    on the network exceeds the per-URL timeout. Once iterated, timed_out tells whether
+    the body was cut short by the timeout, in which case it should not be cached.
+    """
+    def __init__(self, response, timeout=HTTP_TIMEOUT, max_bytes=HTTP_MAX_BYTES, chunk_size=16384):
+        self.response = response
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.timed_out = False
+
+    def __iter__(self):
+        total = 0
+        waited = 0.0
+        chunks = self.response.iter_content(chunk_size=self.chunk_size)
+        while total < self.max_bytes:
+            if waited > self.timeout:
+                self.timed_out = True
+                return
+            started = time.monotonic()
+            chunk = next(chunks, None)
+            waited += time.monotonic() - started
+            if chunk is None:
+                return
+            chunk = chunk[:self.max_bytes - total]
+            total += len(chunk)
+            yield chunk
+
+def iter_body(response, timeout=HTTP_TIMEOUT, max_bytes=HTTP_MAX_BYTES, chunk_size=16384):
+    """
+    Returns a BodyReader over the response body.
+    """
+    return BodyReader(response, timeout=timeout, max_bytes=max_bytes, chunk_size=chunk_size)
+
+def submit(fn, *args):
+    """
+    Runs fn(*args) on the fetch pool and returns its Future.
+    """
+    return submit_with_context(_executor, fn, *args)
+
+def map_as_completed(fn, urls, deadline=HTTP_DEADLINE):
+    """
+    Runs fn(url) for every URL on the fetch pool and yields (url, result) as
+    each one finishes. URLs still running after the overall deadline are dropped.
+    """
+    futures = {submit_with_context(_executor, fn, url): url for url in urls}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            yield futures[future], future.result()
+    except FuturesTimeoutError:
+        pending = [url for future, url in futures.items() if not future.done()]
+        logger.warning("Fetch deadline of %ss exceeded, dropping %d URLs: %s", deadline, len(pending), pending)
+    finally:
+        for future in futures:
+            future.cancel()
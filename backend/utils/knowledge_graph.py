@@ -1,40 +1,198 @@
 # backend/utils/knowledge_graph.py
 
-import time
-from SPARQLWrapper import SPARQLWrapper, JSON, SPARQLExceptions
-import urllib.error
-
-def query_wikidata(claim, max_retries=3, delay=1):
-    sparql = SPARQLWrapper("https://query.wikidata.org/sparql")
-    # Escape { and } by doubling them
-    query = """
-    SELECT ?item ?itemLabel ?itemDescription WHERE {{
-      ?item rdfs:label "{}"@en.
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from config import (WIKIDATA_ENDPOINT, WIKIDATA_RATE, WIKIDATA_BURST, WIKIDATA_MAX_CONCURRENCY,
+                    WIKIDATA_TIMEOUT, KG_ITEMS_PER_ENTITY, KG_MAX_RESULTS, KG_MAX_VALUES)
+from utils.rate_limiter import TokenBucket
+from utils.cache import disk_cache, normalize_query
+from utils.profiling import timed, submit_with_context
+from utils.text_preprocessing import extract_entities
+
+logger = logging.getLogger(__name__)
+
+EMPTY_RESULTS = {"results": {"bindings": []}}
+
+class WikidataClient:
+    """
+    Reusable SPARQL client with a keep-alive session, a shared rate limit,
+    a cap on queries in flight and Retry-After handling.
+    """
+    def __init__(self, endpoint=WIKIDATA_ENDPOINT, rate=WIKIDATA_RATE, burst=WIKIDATA_BURST,
+                 max_concurrency=WIKIDATA_MAX_CONCURRENCY, timeout=WIKIDATA_TIMEOUT):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.reopen()
+
+    def reopen(self):
+        """
+        Creates the session, limits and executor, again in a process forked from the one that created them.
+        """
+        self.rate_limiter = TokenBucket(self.rate, self.burst)
+        self.concurrency = threading.BoundedSemaphore(self.max_concurrency)
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=self.max_concurrency))
+        self.session.headers.update({
+            'Accept': 'application/sparql-results+json',
+            'User-Agent': 'VeriBoard/1.0 (fact-checking research)'
+        })
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='wikidata')
+
+    def query(self, query, max_retries=3, delay=1, cache=True, default=EMPTY_RESULTS):
+        """
+        Returns the query results, or default when every attempt failed. With cache=False the
+        caller caches the results itself, e.g. per entity.
+        """
+        with timed('kg'):
+            results = self._query(query, max_retries, delay, cache)
+        return results if results is not None else default
+
+    def _query(self, query, max_retries, delay, cache):
+        cache_key = normalize_query(query)
+        if cache:
+            cached = disk_cache.get('wikidata', cache_key)
+            if cached is not None:
+                return cached
+        if disk_cache.offline:
+            return None
+
+        for attempt in range(max_retries):
+            self.rate_limiter.acquire()
+            try:
+                with self.concurrency:
+                    response = self.session.get(self.endpoint, params={'query': query, 'format': 'json'},
+                                                timeout=self.timeout)
+            except requests.RequestException as e:
+                logger.warning("Error querying Wikidata: %s", e)
+                break
+            if response.status_code == 429:
+                retry_after = _parse_retry_after(response.headers.get('Retry-After'), delay)
+                logger.info("Wikidata rate limit exceeded, retrying in %s seconds", retry_after)
+                self.rate_limiter.block_for(retry_after)
+                delay *= 2  # Exponential backoff when no Retry-After is given
+                continue
+            if response.status_code != 200:
+                logger.warning("Wikidata HTTP error: %s - %s", response.status_code, response.reason)
+                break
+            try:
+                results = response.json()
+            except ValueError as e:
+                logger.warning("Error decoding Wikidata response: %s", e)
+                break
+            if cache:
+                disk_cache.set('wikidata', cache_key, results)
+            return results
+        # All retries failed
+        return None
+
+    def submit(self, query, max_retries=3):
+        """
+        Runs the query in the background and returns a Future with the results.
+        """
+        return submit_with_context(self.executor, self.query, query, max_retries)
+
+def _parse_retry_after(value, default):
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+wikidata_client = WikidataClient()
+
+# Escapes of the SPARQL string literal grammar (ECHAR)
+SPARQL_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', "'": "\\'", '\n': '\\n', '\r': '\\r',
+                                '\t': '\\t', '\b': '\\b', '\f': '\\f'})
+
+def sparql_literal(text, lang='en'):
+    return f'"{text.translate(SPARQL_ESCAPES)}"@{lang}'
+
+def build_entity_query(names):
+    """
+    One query resolving every entity name to the items with exactly that English label.
+    """
+    values = ' '.join(sparql_literal(name) for name in names)
+    return f"""
+    SELECT ?name ?item ?itemLabel ?itemDescription ?sitelinks WHERE {{
+      VALUES ?name {{ {values} }}
+      ?item rdfs:label ?name.
+      OPTIONAL {{ ?item wikibase:sitelinks ?sitelinks. }}
       OPTIONAL {{ ?item schema:description ?itemDescription. FILTER(LANG(?itemDescription) = "en") }}
       SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
     }}
-    LIMIT 5
-    """.format(claim)
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
-
-    for attempt in range(max_retries):
-        try:
-            results = sparql.query().convert()
-            return results
-        except urllib.error.HTTPError as e:
-            if e.code == 429:
-                print(f"Rate limit exceeded. Retrying in {delay} seconds...")
-                time.sleep(delay)
-                delay *= 2  # Exponential backoff
-            else:
-                print(f"HTTP Error: {e.code} - {e.reason}")
-                break
-        except Exception as e:
-            print(f"Error querying Wikidata: {e}")
-            break
-    # Return empty results if all retries fail
-    return {"results": {"bindings": []}}
+    """
+
+def resolve_entities(names, max_retries=3):
+    """
+    Returns {name: bindings} with the best-known items (most sitelinks first) of each entity
+    name. Names are looked up in the local entity cache first; the others are resolved
+    KG_MAX_VALUES at a time with one VALUES query each.
+    """
+    resolved = {}
+    missing = []
+    for name in dict.fromkeys(names):
+        cached = disk_cache.get('wikidata_entity', name)
+        if cached is not None:
+            resolved[name] = cached
+        else:
+            missing.append(name)
+
+    for start in range(0, len(missing), KG_MAX_VALUES):
+        batch = missing[start:start + KG_MAX_VALUES]
+        results = wikidata_client.query(build_entity_query(batch), max_retries, cache=False, default=None)
+        if results is None:
+            continue  # Not cached, so the names are retried by the next request
+        items = {name: [] for name in batch}
+        for binding in results.get("results", {}).get("bindings", []):
+            name = binding.get("name", {}).get("value")
+            if name in items:
+                items[name].append(binding)
+        for name, bindings in items.items():
+            bindings.sort(key=lambda binding: -int(binding.get("sitelinks", {}).get("value", 0)))
+            # Names without any match are cached too, so they are not queried again
+            resolved[name] = bindings[:KG_ITEMS_PER_ENTITY]
+            disk_cache.set('wikidata_entity', name, resolved[name])
+    return resolved
+
+def query_claims(claims, max_retries=3):
+    """
+    Knowledge graph evidence for several claims: their named entities are extracted together,
+    deduplicated across claims and resolved at once. Returns {claim: SPARQL JSON results}
+    holding at most KG_MAX_RESULTS distinct items per claim.
+    """
+    claims = list(dict.fromkeys(claims))
+    with timed('kg'):
+        entity_lists = extract_entities(claims)
+    resolved = resolve_entities([name for names in entity_lists for name in names], max_retries)
+
+    results = {}
+    for claim, names in zip(claims, entity_lists):
+        bindings = {}
+        for name in names:
+            for binding in resolved.get(name, []):
+                bindings.setdefault(binding["item"]["value"], binding)
+        results[claim] = {"results": {"bindings": list(bindings.values())[:KG_MAX_RESULTS]}}
+    return results
+
+def query_claims_async(claims, max_retries=3):
+    """
+    Starts the knowledge graph lookup of several claims without blocking; returns a Future of query_claims.
+    """
+    return submit_with_context(wikidata_client.executor, query_claims, claims, max_retries)
+
+def query_wikidata(claim, max_retries=3):
+    return query_claims([claim], max_retries)[claim]
+
+def query_wikidata_async(claim, max_retries=3):
+    """
+    Starts the Wikidata lookup for a claim without blocking; call .result() on the returned Future.
+    """
+    return submit_with_context(wikidata_client.executor, query_wikidata, claim, max_retries)
 
 def extract_texts_from_kg_results(results):
     texts = []
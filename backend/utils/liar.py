@@ -0,0 +1,25 @@
+# backend/utils/liar.py
+
+import pandas as pd
+
+def load_liar_dataset(dataset_path):
+    liar_df = pd.read_csv(dataset_path, sep='\t', header=None)
+    liar_df.columns = [
+        'id', 'label', 'statement', 'subject', 'speaker', 'speaker_job_title',
+        'state_info', 'party_affiliation', 'barely_true_counts', 'false_counts',
+        'half_true_counts', 'mostly_true_counts', 'pants_on_fire_counts',
+        'context'
+    ]
+    return liar_df
+
+def map_ground_truth_label(label):
+    # Map LIAR dataset labels to your application's labels
+    label_mapping = {
+        'true': 'Supported',
+        'mostly-true': 'Supported',
+        'half-true': 'Not Enough Information',
+        'barely-true': 'Refuted',
+        'false': 'Refuted',
+        'pants-fire': 'Refuted'
+    }
+    return label_mapping.get(label.lower(), 'Not Enough Information')
@@ -0,0 +1,275 @@
+# backend/utils/local_index.py
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+from config import LOCAL_INDEX_DIR, LOCAL_INDEX_TOP_K, LOCAL_INDEX_MAX_DF, LOCAL_INDEX_MAX_POSTINGS, LOCAL_INDEX_NPROBE
+from utils.chunking import PassageChunker
+from utils.profiling import timed
+from utils.vector_index import IVFIndex
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his in is it its of on or she that the their they this
+to was were which who will with
+""".split())
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class LocalIndex:
+    """
+    Offline evidence index over a corpus of documents split into chunks, passages that
+    fit the embedding model's input window.
+
+    Documents, chunks and a BM25 inverted index live in SQLite. BM25 skips terms found in
+    more than max_df of the chunks and reads at most max_postings postings per query term,
+    highest term frequency first. MiniLM chunk embeddings are appended to a float16 file,
+    row n of which is chunk id n, and searched through an IVF index loaded from it.
+    Documents can be added at any time; URLs that are already indexed are skipped.
+    """
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+    RRF_K = 60  # Reciprocal rank fusion constant
+
+    def __init__(self, embeddings, directory=LOCAL_INDEX_DIR, chunker=None, max_df=LOCAL_INDEX_MAX_DF,
+                 max_postings=LOCAL_INDEX_MAX_POSTINGS, nprobe=LOCAL_INDEX_NPROBE):
+        self.embeddings = embeddings
+        self.directory = directory
+        model = embeddings.model
+        if chunker is None:
+            # Leave room for the special tokens the encoder adds
+            chunker = PassageChunker(getattr(model, 'tokenizer', None), max_tokens=getattr(model, 'max_seq_length', 128) - 2)
+        self.chunker = chunker
+        self.max_df = max_df
+        self.max_postings = max_postings
+        self.dim = model.get_sentence_embedding_dimension()
+        self.vectors_path = os.path.join(directory, 'vectors.f16')
+        self.lock = threading.Lock()
+        self.dense = IVFIndex(self.dim, nprobe=nprobe, dtype=np.float16)
+        self.dense_rows = 0  # Rows of the vectors file loaded into self.dense
+        os.makedirs(directory, exist_ok=True)
+        self.conn = self._connect()
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                paragraphs TEXT NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chunks_url ON chunks (url);
+            CREATE TABLE IF NOT EXISTS documents (
+                url TEXT PRIMARY KEY,
+                paragraphs TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                chunk_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL
+            );
+            DROP INDEX IF EXISTS postings_term;
+            CREATE INDEX IF NOT EXISTS postings_term_tf ON postings (term, tf DESC);
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                chunks INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO stats (id, chunks, total_length) VALUES (0, 0, 0);
+        """)
+        if self.conn.execute('SELECT 1 FROM terms LIMIT 1').fetchone() is None:
+            # Indexes built before document frequencies were kept
+            self.conn.execute('INSERT INTO terms (term, df) SELECT term, COUNT(*) FROM postings GROUP BY term')
+        self.conn.commit()
+        self._truncate_vectors(self.conn.execute('SELECT chunks FROM stats').fetchone()[0])
+
+    def _connect(self):
+        return sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'), check_same_thread=False)
+
+    def reopen(self):
+        """
+        Opens a fresh connection, e.g. in a process forked from the one that created the index.
+        """
+        self.lock = threading.Lock()
+        self.conn = self._connect()
+
+    def _truncate_vectors(self, rows):
+        # Rows past the committed chunk count are left over from an add that failed or was
+        # interrupted before its commit; drop them so later vectors line up with their chunks again
+        size = rows * self.dim * np.dtype(np.float16).itemsize
+        current = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if current < size:
+            raise RuntimeError(f"{self.vectors_path} has fewer rows than the {rows} indexed chunks; rebuild the index.")
+        if current > size:
+            with open(self.vectors_path, 'r+b') as f:
+                f.truncate(size)
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT chunks FROM stats').fetchone()[0]
+
+    def has_url(self, url):
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM chunks WHERE url = ? LIMIT 1', (url,)).fetchone() is not None
+
+    def add_documents(self, documents):
+        """
+        Indexes an iterable of (url, paragraphs) pairs. Returns the number of chunks added.
+        """
+        kept = {}
+        chunks = []
+        for url, paragraphs in documents:
+            if url in kept or self.has_url(url):
+                continue
+            paragraphs = [paragraph for paragraph in paragraphs if paragraph.strip()]
+            passages = self.chunker.chunk(paragraphs).passages()
+            if passages:
+                kept[url] = paragraphs
+                chunks.extend((url, passage) for passage in passages)
+        if not chunks:
+            return 0
+
+        vectors = self.embeddings.encode([passage for _, passage in chunks]).astype(np.float16)
+        with self.lock:
+            first_id = self.conn.execute('SELECT chunks FROM stats').fetchone()[0]
+            self._truncate_vectors(first_id)
+            try:
+                self.conn.executemany('INSERT INTO documents (url, paragraphs) VALUES (?, ?)',
+                                      [(url, json.dumps(paragraphs)) for url, paragraphs in kept.items()])
+                total_length = 0
+                for offset, (url, passage) in enumerate(chunks):
+                    # Chunk ids double as row numbers in the vectors file
+                    chunk_id = first_id + offset
+                    terms = Counter(tokenize(passage))
+                    length = sum(terms.values())
+                    total_length += length
+                    self.conn.execute('INSERT INTO chunks (id, url, paragraphs, length) VALUES (?, ?, ?, ?)',
+                                      (chunk_id, url, json.dumps([passage]), length))
+                    self.conn.executemany('INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)',
+                                          [(term, chunk_id, tf) for term, tf in terms.items()])
+                    self.conn.executemany('INSERT INTO terms (term, df) VALUES (?, 1) '
+                                          'ON CONFLICT (term) DO UPDATE SET df = df + 1', [(term,) for term in terms])
+                # Vectors are on disk before the chunks are committed: a crash in between only
+                # leaves rows past the chunk count, which are truncated on the next open or add
+                with open(self.vectors_path, 'ab') as f:
+                    f.write(vectors.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.conn.execute('UPDATE stats SET chunks = chunks + ?, total_length = total_length + ?',
+                                  (len(chunks), total_length))
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                self._truncate_vectors(first_id)
+                raise
+        return len(chunks)
+
+    def document(self, url):
+        """
+        Returns every indexed paragraph of a document, in order.
+        """
+        with self.lock:
+            row = self.conn.execute('SELECT paragraphs FROM documents WHERE url = ?', (url,)).fetchone()
+            if row is not None:
+                return json.loads(row[0])
+            # Indexes built before whole documents were stored chunked them by paragraph
+            rows = self.conn.execute('SELECT paragraphs FROM chunks WHERE url = ? ORDER BY id', (url,)).fetchall()
+        return [paragraph for row in rows for paragraph in json.loads(row[0])]
+
+    def load_vectors(self):
+        """
+        Loads the chunk vectors into the IVF index, e.g. while the models load at startup
+        rather than on the first search. Searches load vectors added later themselves.
+        """
+        with self.lock:
+            self._load_vectors(self.conn.execute('SELECT chunks FROM stats').fetchone()[0])
+
+    def _load_vectors(self, rows):
+        # Callers hold self.lock. Also picks up chunks another process has added since.
+        if rows <= self.dense_rows:
+            return
+        vectors = np.memmap(self.vectors_path, dtype=np.float16, mode='r', shape=(rows, self.dim))
+        self.dense.add(range(self.dense_rows, rows), vectors[self.dense_rows:rows])
+        self.dense_rows = rows
+
+    def _bm25(self, query, n_chunks, avg_length, limit):
+        scores = {}
+        for term in set(tokenize(query)):
+            row = self.conn.execute('SELECT df FROM terms WHERE term = ?', (term,)).fetchone()
+            if row is None:
+                continue
+            df = row[0]
+            if df > self.max_postings and df > self.max_df * n_chunks:
+                # Too common to tell chunks apart, and the longest posting lists to read
+                continue
+            idf = math.log(1 + (n_chunks - df + 0.5) / (df + 0.5))
+            postings = self.conn.execute(
+                'SELECT p.chunk_id, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk_id '
+                'WHERE p.term = ? ORDER BY p.tf DESC LIMIT ?', (term, self.max_postings)).fetchall()
+            for chunk_id, tf, length in postings:
+                norm = tf + self.BM25_K1 * (1 - self.BM25_B + self.BM25_B * length / avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.BM25_K1 + 1) / norm
+        return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+    def search(self, query, k=LOCAL_INDEX_TOP_K, candidates=50):
+        """
+        Hybrid search: BM25 and dense rankings fused by reciprocal rank.
+        Returns up to k (url, paragraphs, score) chunk hits.
+        """
+        query_vector = self.embeddings.encode_one(query).astype(np.float32)
+        with self.lock:
+            n_chunks, total_length = self.conn.execute('SELECT chunks, total_length FROM stats').fetchone()
+            if not n_chunks:
+                return []
+            rankings = [self._bm25(query, n_chunks, total_length / n_chunks, candidates)]
+            self._load_vectors(n_chunks)
+            rankings.append([chunk_id for chunk_id, _ in self.dense.search(query_vector, k=candidates)])
+
+            fused = {}
+            for ranking in rankings:
+                for rank, chunk_id in enumerate(ranking):
+                    fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (self.RRF_K + rank + 1)
+            best = sorted(fused, key=fused.get, reverse=True)[:k]
+            hits = []
+            for chunk_id in best:
+                url, paragraphs = self.conn.execute('SELECT url, paragraphs FROM chunks WHERE id = ?', (chunk_id,)).fetchone()
+                hits.append((url, json.loads(paragraphs), fused[chunk_id]))
+        return hits
+
+class LocalRetriever:
+    """
+    Same interface as WebRetriever, backed by a LocalIndex so it needs no network.
+    """
+    def __init__(self, index, top_k=LOCAL_INDEX_TOP_K):
+        self.index = index
+        self.top_k = top_k
+
+    def reopen(self):
+        self.index.reopen()
+
+    def iter_evidence(self, claim, extract=None):
+        for url in self.search(claim):
+            yield {'url': url, 'content': self.fetch(url, extract=extract)}
+
+    def search(self, claim):
+        """
+        Returns the URLs of the top_k documents, ordered by their best matching chunk.
+        """
+        with timed('search'):
+            hits = self.index.search(claim, k=self.top_k * 3)
+        return list(OrderedDict.fromkeys(url for url, _, _ in hits))[:self.top_k]
+
+    def fetch(self, url, extract=None):
+        paragraphs = self.index.document(url)
+        return extract(iter(paragraphs)) if extract is not None else ' '.join(paragraphs)
+
+    def retrieve_evidence(self, claim):
+        return list(self.iter_evidence(claim))
@@ -0,0 +1,72 @@
+# backend/utils/metrics.py
+
+import bisect
+import os
+import threading
+
+class Histogram:
+    """
+    Cumulative bucketed histogram in the style of Prometheus.
+    """
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A thread of the parent may have held the lock when it forked. A forked process
+        # counts its own observations; the parent's are reported by the parent.
+        self.lock = threading.Lock()
+        self.counts = [0] * len(self.counts)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self.lock:
+            cumulative = []
+            total = 0
+            for upper, count in zip(self.buckets + [float('inf')], self.counts):
+                total += count
+                cumulative.append((upper, total))
+            return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+def merge_snapshots(first, second):
+    """
+    Sums two snapshots of histograms with the same buckets, e.g. taken in different processes.
+    """
+    return {
+        'buckets': [(upper, a + b) for (upper, a), (_, b) in zip(first['buckets'], second['buckets'])],
+        'sum': first['sum'] + second['sum'],
+        'count': first['count'] + second['count']
+    }
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+def render_histogram(name, snapshot, labels=None):
+    """
+    Renders a Histogram snapshot in the Prometheus text exposition format.
+    """
+    labels = labels or {}
+    lines = []
+    for upper, count in snapshot['buckets']:
+        le = '+Inf' if upper == float('inf') else repr(upper)
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {count}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+def render_value(name, value, labels=None):
+    return f"{name}{_format_labels(labels)} {value}"
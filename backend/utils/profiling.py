@@ -0,0 +1,85 @@
+# backend/utils/profiling.py
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from utils.metrics import Histogram
+
+STAGES = ('preprocess', 'detection', 'search', 'fetch', 'relevance', 'kg', 'qa', 'nli', 'multi_hop', 'aggregation')
+STAGE_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+stage_seconds = {stage: Histogram(STAGE_BUCKETS) for stage in STAGES}
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_trace_lock = threading.Lock()
+
+def _after_fork():
+    # A thread of the parent may have held the lock when it forked
+    global _trace_lock
+    _trace_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_after_fork)
+
+def record(stage, seconds):
+    stage_seconds[stage].observe(seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        with _trace_lock:
+            trace.append({'stage': stage, 'seconds': seconds})
+
+@contextmanager
+def timed(stage):
+    """
+    Times the block as one observation of the given pipeline stage.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+def timed_iter(iterable, stage):
+    """
+    Yields from iterable, recording only the time spent producing items
+    (not the time the consumer holds each one) as a single observation.
+    """
+    elapsed = 0.0
+    iterator = iter(iterable)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                elapsed += time.perf_counter() - started
+                return
+            elapsed += time.perf_counter() - started
+            yield item
+    finally:
+        record(stage, elapsed)
+
+@contextmanager
+def tracing(enabled=True):
+    """
+    Collects the stage timings of the block into the yielded list (None when disabled).
+    Work submitted with submit_with_context carries the trace to other threads.
+    """
+    trace = [] if enabled else None
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+def summarize_trace(trace):
+    totals = {}
+    for entry in trace:
+        totals[entry['stage']] = totals.get(entry['stage'], 0.0) + entry['seconds']
+    return {'stages': totals, 'events': trace}
+
+def submit_with_context(executor, fn, *args):
+    """
+    executor.submit that runs fn in a copy of the caller's context, so traces follow the work.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args)
@@ -1,24 +1,46 @@
-from sentence_transformers import util
+import numpy as np
+from utils.embeddings import EmbeddingService, top_k_indices
+from utils.chunking import PassageChunker
 
 class RelevanceFilter:
-    def __init__(self, model):
+    def __init__(self, model, embeddings=None, chunker=None):
         self.model = model
+        # Share the embedding cache with SimilarityCalculator when one is given
+        self.embeddings = embeddings if embeddings is not None else EmbeddingService(model)
+        self.chunker = chunker if chunker is not None else PassageChunker(getattr(model, 'tokenizer', None))
+
+    def chunk_paragraphs(self, paragraphs):
+        """
+        Splits a (possibly still streaming) page into token-bounded, overlapping passages.
+        """
+        return self.chunker.chunk(paragraphs)
+
+    def select_passages(self, claims, documents, top_k=7):
+        """
+        Picks the top_k passages of every chunked document for every claim. All passages
+        are encoded in one call and scored against all claims in one matrix product.
+        Returns, per claim, the relevant text of each document ('' when it has no passages).
+        """
+        passages = [passage for document in documents for passage in document.passages()]
+        if not passages:
+            return [['' for _ in documents] for _ in claims]
+        # Passage vectors stay float16 until the product, which computes in float32
+        scores = self.embeddings.encode(claims) @ self.embeddings.encode(passages, dtype=np.float16).T
+        bounds = np.cumsum([0] + [len(document) for document in documents])
+
+        selected = []
+        for claim_scores in scores:
+            texts = []
+            for document, start, end in zip(documents, bounds[:-1], bounds[1:]):
+                if start == end:
+                    texts.append('')
+                else:
+                    texts.append(document.join(top_k_indices(claim_scores[start:end], top_k)))
+            selected.append(texts)
+        return selected
 
     def extract_relevant_passages(self, claim, text, top_k=7):
-        # Split text into sentences or passages
-        passages = text.split('. ')
-        # Compute similarity scores
-        scores = []
-        for passage in passages:
-            score = self.compute_similarity(claim, passage)
-            scores.append((passage, score))
-        # Sort and select top_k passages
-        sorted_passages = sorted(scores, key=lambda x: x[1], reverse=True)
-        top_passages = [p[0] for p in sorted_passages[:top_k]]
-        return ' '.join(top_passages)
+        return self.select_passages([claim], [self.chunker.chunk_text(text)], top_k)[0][0]
 
     def compute_similarity(self, text1, text2):
-        embeddings1 = self.model.encode(text1, convert_to_tensor=True)
-        embeddings2 = self.model.encode(text2, convert_to_tensor=True)
-        cosine_scores = util.pytorch_cos_sim(embeddings1, embeddings2)
-        return cosine_scores.item()
+        return float(self.embeddings.scores(text1, [text2])[0])
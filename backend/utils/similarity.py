@@ -1,14 +1,19 @@
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
+from utils.embeddings import EmbeddingService
 
 class SimilarityCalculator:
     def __init__(self):
         self.model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
-    
+        self.embeddings = EmbeddingService(self.model)
+
     def compute_similarity(self, claim, passage):
         """
         Computes the cosine similarity between the claim and the passage.
         """
-        claim_embedding = self.model.encode(claim, convert_to_tensor=True)
-        passage_embedding = self.model.encode(passage, convert_to_tensor=True)
-        similarity_score = util.pytorch_cos_sim(claim_embedding, passage_embedding).item()
-        return similarity_score
+        return float(self.embeddings.scores(claim, [passage])[0])
+
+    def compute_similarities(self, claim, passages):
+        """
+        Cosine similarity of the claim against every passage, encoded in one batch.
+        """
+        return [float(score) for score in self.embeddings.scores(claim, passages)]
@@ -1,8 +1,93 @@
+import hashlib
+import os
 import re
+import threading
+from collections import OrderedDict
 import spacy
+from config import SENTENCE_SEGMENTER, SEGMENTER_PROCESSES, SEGMENTER_BATCH_SIZE, SENTENCE_CACHE_SIZE
 
-# Load the spaCy English language model
-nlp = spacy.load('en_core_web_sm')
+SPACY_MODEL = 'en_core_web_sm'
+# Components each segmentation mode can drop from en_core_web_sm without changing doc.sents.
+# 'parser' keeps the dependency parser (same sentences as the full pipeline), 'senter' uses the
+# smaller statistical sentence recognizer instead, and 'sentencizer' is rule-based punctuation splitting.
+SEGMENTER_EXCLUDE = {
+    'parser': ['tagger', 'attribute_ruler', 'lemmatizer', 'ner', 'senter'],
+    'senter': ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner'],
+}
+
+# Only the entity recognizer (and the tok2vec layer it listens to) is needed to find entities
+ENTITY_EXCLUDE = ['tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter']
+# Entity types worth looking up in the knowledge graph; dates, numbers and amounts are not
+ENTITY_LABELS = {'PERSON', 'NORP', 'FAC', 'ORG', 'GPE', 'LOC', 'PRODUCT', 'EVENT', 'WORK_OF_ART', 'LAW', 'LANGUAGE'}
+
+_nlp = None
+_entity_recognizer = None
+_nlp_lock = threading.Lock()
+_segmenters = {}
+_sentence_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _after_fork():
+    # A thread of the parent may have held either lock when it forked
+    global _nlp_lock, _cache_lock
+    _nlp_lock = threading.Lock()
+    _cache_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_after_fork)
+
+def get_nlp():
+    """
+    Loads the full spaCy English language model on first use.
+    """
+    global _nlp
+    with _nlp_lock:
+        if _nlp is None:
+            _nlp = spacy.load(SPACY_MODEL)
+        return _nlp
+
+def get_segmenter(mode=SENTENCE_SEGMENTER):
+    """
+    Loads, on first use, a spaCy pipeline with only what the given mode needs to split sentences.
+    """
+    with _nlp_lock:
+        if mode not in _segmenters:
+            if mode == 'sentencizer':
+                nlp = spacy.blank('en')
+                nlp.add_pipe('sentencizer')
+            elif mode in SEGMENTER_EXCLUDE:
+                nlp = spacy.load(SPACY_MODEL, exclude=SEGMENTER_EXCLUDE[mode])
+                if mode == 'senter':
+                    nlp.enable_pipe('senter')  # Disabled by default in the trained pipelines
+            else:
+                raise ValueError(f"Unknown sentence segmenter: {mode}")
+            _segmenters[mode] = nlp
+        return _segmenters[mode]
+
+def get_entity_recognizer():
+    """
+    Loads, on first use, a spaCy pipeline with only the named entity recognizer.
+    """
+    global _entity_recognizer
+    with _nlp_lock:
+        if _entity_recognizer is None:
+            _entity_recognizer = spacy.load(SPACY_MODEL, exclude=ENTITY_EXCLUDE)
+        return _entity_recognizer
+
+def extract_entities(texts, batch_size=SEGMENTER_BATCH_SIZE):
+    """
+    Returns the distinct named entities of each text, in order of appearance.
+    """
+    entities = []
+    for doc in get_entity_recognizer().pipe(texts, batch_size=batch_size):
+        names = {}
+        for ent in doc.ents:
+            if ent.label_ not in ENTITY_LABELS:
+                continue
+            # "the Eiffel Tower" is labelled "Eiffel Tower" in Wikidata
+            span = ent[1:] if ent[0].lower_ == 'the' and len(ent) > 1 else ent
+            names[span.text.strip()] = None
+        entities.append(list(names))
+    return entities
 
 def preprocess_text(text):
     """
@@ -12,10 +97,47 @@ def preprocess_text(text):
     text = re.sub(r"http\S+|www.\S+|@\S+|#\S+", "", text)
     return text.strip()
 
-def split_into_sentences(text):
+def _cache_key(mode, text):
+    return mode, hashlib.sha1(text.encode('utf-8')).digest()
+
+def _sentences(doc):
+    return [sent.text.strip() for sent in doc.sents]
+
+def split_into_sentences(text, mode=SENTENCE_SEGMENTER):
     """
     Splits text into sentences using spaCy.
     """
-    doc = nlp(text)
-    sentences = [sent.text.strip() for sent in doc.sents]
-    return sentences
+    return split_many([text], mode=mode)[0]
+
+def split_many(texts, mode=SENTENCE_SEGMENTER, n_process=SEGMENTER_PROCESSES, batch_size=SEGMENTER_BATCH_SIZE):
+    """
+    Splits every text into sentences. Results are cached per text hash and the texts
+    missing from the cache go through nlp.pipe together, over n_process processes.
+    """
+    keys = [_cache_key(mode, text) for text in texts]
+    results = [None] * len(texts)
+    missing = {}
+    with _cache_lock:
+        for i, key in enumerate(keys):
+            sentences = _sentence_cache.get(key)
+            if sentences is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                _sentence_cache.move_to_end(key)
+                results[i] = list(sentences)
+
+    if missing:
+        missing_texts = [texts[indices[0]] for indices in missing.values()]
+        # Worker processes only pay off when there is enough text to spread across them
+        n_process = n_process if len(missing_texts) >= n_process * batch_size else 1
+        docs = get_segmenter(mode).pipe(missing_texts, n_process=n_process, batch_size=batch_size)
+        split = [tuple(_sentences(doc)) for doc in docs]
+        with _cache_lock:
+            for (key, indices), sentences in zip(missing.items(), split):
+                for i in indices:
+                    results[i] = list(sentences)
+                _sentence_cache[key] = sentences
+                _sentence_cache.move_to_end(key)
+            while len(_sentence_cache) > SENTENCE_CACHE_SIZE:
+                _sentence_cache.popitem(last=False)
+    return results
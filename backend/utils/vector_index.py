@@ -0,0 +1,132 @@
+# backend/utils/vector_index.py
+
+import numpy as np
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index over normalised vectors.
+
+    Below min_train_size every lookup is an exact scan. Past that, the vectors are
+    clustered with spherical k-means, trained on a sample of at most max_train_size
+    of them, and a lookup only scans the nprobe closest clusters. New vectors are
+    appended to their nearest cluster, and the clusters are retrained once the index
+    has doubled in size since the last training. Vectors may be stored as float16;
+    scores are always computed in float32.
+    """
+    def __init__(self, dim, nprobe=4, min_train_size=1024, max_train_size=131072, dtype=np.float32, block_size=65536):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.max_train_size = max_train_size
+        self.block_size = block_size
+        self.dtype = dtype
+        self.vectors = np.zeros((0, dim), dtype=dtype)  # Grown in amortised steps past len(self.ids)
+        self.ids = []
+        self.alive = np.zeros(0, dtype=bool)
+        self.positions = {}
+        self.centroids = None
+        self.lists = []
+        self.trained_size = 0
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add(self, ids, vectors):
+        vectors = np.asarray(vectors, dtype=self.dtype).reshape(-1, self.dim)
+        for item_id in ids:
+            self.remove(item_id)
+        start = len(self.ids)
+        self._reserve(start + len(ids))
+        self.vectors[start:start + len(ids)] = vectors
+        self.alive[start:start + len(ids)] = True
+        for offset, item_id in enumerate(ids):
+            self.ids.append(item_id)
+            self.positions[item_id] = start + offset
+
+        if self.centroids is None:
+            if len(self) >= self.min_train_size:
+                self.rebuild()
+        elif len(self) >= 2 * self.trained_size:
+            self.rebuild()
+        else:
+            for offset, cluster in enumerate(self._assign(vectors)):
+                self.lists[cluster].append(start + offset)
+
+    def _assign(self, vectors):
+        # Nearest centroid of each vector, a block at a time so the score matrix stays small
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), self.block_size):
+            block = np.asarray(vectors[start:start + self.block_size], dtype=np.float32)
+            assignments[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignments
+
+    def _reserve(self, size):
+        # Doubles the capacity when full, so adding one vector at a time is not quadratic
+        if size <= len(self.vectors):
+            return
+        capacity = max(size, 2 * len(self.vectors), 64)
+        vectors = np.zeros((capacity, self.dim), dtype=self.dtype)
+        vectors[:len(self.ids)] = self.vectors[:len(self.ids)]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self.ids)] = self.alive[:len(self.ids)]
+        self.vectors, self.alive = vectors, alive
+
+    def remove(self, item_id):
+        position = self.positions.pop(item_id, None)
+        if position is not None:
+            self.alive[position] = False
+
+    def rebuild(self, iterations=10):
+        """
+        Compacts removed vectors away and retrains the clusters.
+        """
+        live = np.flatnonzero(self.alive)
+        self.vectors = self.vectors[live]
+        self.ids = [self.ids[i] for i in live]
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self.positions = {item_id: i for i, item_id in enumerate(self.ids)}
+        if len(self.ids) < self.min_train_size:
+            self.centroids = None
+            self.lists = []
+            self.trained_size = 0
+            return
+
+        n_lists = max(1, int(np.sqrt(len(self.ids))))
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(self.ids), min(len(self.ids), max(self.max_train_size, n_lists)), replace=False)
+        sample = np.asarray(self.vectors[np.sort(sample)], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        self.centroids = centroids
+        assignments = self._assign(self.vectors)
+        order = np.argsort(assignments, kind='stable')
+        bounds = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        self.lists = [order[bounds[cluster]:bounds[cluster + 1]].tolist() for cluster in range(n_lists)]
+        self.trained_size = len(self.ids)
+
+    def search(self, vector, k=1):
+        """
+        Returns up to k (id, score) pairs with the highest cosine similarity.
+        """
+        if not len(self):
+            return []
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.centroids is None:
+            candidates = np.flatnonzero(self.alive)
+        else:
+            probes = np.argsort(-(self.centroids @ vector))[:self.nprobe]
+            candidates = np.array([i for cluster in probes for i in self.lists[cluster]], dtype=np.int64)
+            candidates = candidates[self.alive[candidates]] if len(candidates) else candidates
+        if not len(candidates):
+            return []
+        scores = np.asarray(self.vectors[candidates], dtype=np.float32) @ vector
+        k = min(k, len(candidates))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.ids[candidates[i]], float(scores[i])) for i in best]
@@ -0,0 +1,146 @@
+# backend/utils/verdict_store.py
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+from config import VERDICT_STORE_PATH, VERDICT_SIMILARITY_THRESHOLD, VERDICT_TTL, VERDICT_NPROBE, VERDICT_PURGE_INTERVAL
+from utils.text_preprocessing import extract_entities
+from utils.vector_index import IVFIndex
+
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+WORD_PATTERN = re.compile(r"\w+(?:'\w+)?")
+NEGATIONS = frozenset('not no never none nobody nothing nowhere neither nor without cannot'.split())
+
+def claim_terms(claim):
+    """
+    The numbers and negation words of a claim, which sentence embeddings barely tell apart:
+    "330 metres" and "300 metres", or "is" and "is not", score as near duplicates.
+    """
+    text = claim.lower().replace('\u2019', "'")
+    numbers = sorted(number.replace(',', '') for number in NUMBER_PATTERN.findall(text))
+    negations = sorted(word for word in WORD_PATTERN.findall(text) if word in NEGATIONS or word.endswith("n't"))
+    return numbers, negations
+
+class VerdictStore:
+    """
+    Persistent store of aggregated claim results, looked up by claim embedding.
+    A new claim reuses the verdict and evidence links of a stored claim that is at
+    least `threshold` similar and has the same numbers, negations and named entities.
+    Entries expire after `ttl` seconds and are deleted every `purge_interval` seconds.
+    """
+    def __init__(self, embeddings, path=VERDICT_STORE_PATH, threshold=VERDICT_SIMILARITY_THRESHOLD,
+                 ttl=VERDICT_TTL, nprobe=VERDICT_NPROBE, purge_interval=VERDICT_PURGE_INTERVAL, candidates=5):
+        self.embeddings = embeddings
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.candidates = candidates
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                claim TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                result TEXT NOT NULL,
+                expires REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+        dim = embeddings.model.get_sentence_embedding_dimension()
+        self.index = IVFIndex(dim, nprobe=nprobe)
+        self._load()
+
+    def _load(self):
+        # Drop expired rows and index the rest
+        self.last_purge = time.time()
+        self.conn.execute('DELETE FROM verdicts WHERE expires < ?', (self.last_purge,))
+        self.conn.commit()
+        rows = self.conn.execute('SELECT id, embedding FROM verdicts').fetchall()
+        if rows:
+            self.index.add([row[0] for row in rows], np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows]))
+
+    def reopen(self):
+        """
+        Opens a fresh connection, e.g. in a process forked from the one that created the store.
+        """
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+
+    def lookup(self, claim):
+        """
+        Returns the stored result of the most similar unexpired claim, or None.
+        """
+        vector = self.embeddings.encode_one(claim)
+        terms = claim_terms(claim)
+        with self.lock:
+            matches = []
+            for verdict_id, score in self.index.search(vector, k=self.candidates):
+                if score < self.threshold:
+                    break
+                row = self.conn.execute('SELECT claim, result, expires FROM verdicts WHERE id = ?', (verdict_id,)).fetchone()
+                if row is None or row[2] < time.time():
+                    self._delete(verdict_id)
+                    continue
+                if claim_terms(row[0]) == terms:
+                    matches.append((row, score))
+        if matches:
+            # Named entities last, as they need the spaCy pipeline
+            entities = extract_entities([claim] + [row[0] for row, _ in matches])
+            for (row, score), matched_entities in zip(matches, entities[1:]):
+                if set(matched_entities) == set(entities[0]):
+                    with self.lock:
+                        self.hits += 1
+                    result = json.loads(row[1])
+                    result['cached'] = {'matched_claim': row[0], 'similarity': score}
+                    return result
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def add(self, claim, result):
+        vector = self.embeddings.encode_one(claim).astype(np.float32)
+        with self.lock:
+            cursor = self.conn.execute(
+                'INSERT INTO verdicts (claim, embedding, result, expires) VALUES (?, ?, ?, ?)',
+                (claim, vector.tobytes(), json.dumps(result), time.time() + self.ttl)
+            )
+            self.conn.commit()
+            self.index.add([cursor.lastrowid], vector[None, :])
+            if time.time() - self.last_purge > self.purge_interval:
+                self._purge_expired()
+
+    def _delete(self, verdict_id):
+        # Callers hold self.lock
+        self.conn.execute('DELETE FROM verdicts WHERE id = ?', (verdict_id,))
+        self.conn.commit()
+        self.index.remove(verdict_id)
+
+    def purge_expired(self):
+        """
+        Deletes expired verdicts. Runs every purge_interval seconds as verdicts are added.
+        """
+        with self.lock:
+            return self._purge_expired()
+
+    def _purge_expired(self):
+        # Callers hold self.lock
+        self.last_purge = time.time()
+        expired = [row[0] for row in self.conn.execute('SELECT id FROM verdicts WHERE expires < ?', (self.last_purge,))]
+        self.conn.execute('DELETE FROM verdicts WHERE expires < ?', (self.last_purge,))
+        self.conn.commit()
+        for verdict_id in expired:
+            self.index.remove(verdict_id)
+        return len(expired)
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.index), 'hits': self.hits, 'misses': self.misses}
@@ -54,25 +54,63 @@ document.getElementById('analyzeButton').addEventListener('click', () => {
 
     const data = { text: inputText };
 
-    fetch('http://localhost:5000/analyze', {
+    clearResults();
+
+    // Stream NDJSON events so each claim is shown as soon as it is verified
+    fetch('http://localhost:5000/analyze/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(data)
     })
-    .then(response => response.json())
-    .then(result => {
-        displayResults(result);
+    .then(async response => {
+        if (!response.ok) {
+            displayResults(await response.json());
+            return;
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.filter(line => line.trim()).forEach(line => handleStreamEvent(JSON.parse(line)));
+        }
     })
     .catch(error => {
         console.error('Error:', error);
     });
 });
 
+function handleStreamEvent(event) {
+    const resultsDiv = document.getElementById('results');
+    if (event.type === 'claims') {
+        resultsDiv.innerText = `Verifying ${event.claims.length} claim(s)...`;
+    } else if (event.type === 'result') {
+        if (!resultsDiv.querySelector('.result-item')) {
+            resultsDiv.innerHTML = '';
+        }
+        appendResult(event.result);
+    } else if (event.type === 'message') {
+        resultsDiv.innerText = event.message;
+    }
+}
+
+function clearResults() {
+    document.getElementById('results').innerHTML = '';
+    document.getElementById('evidence-links').innerHTML = '';
+}
+
 function displayResults(result) {
     const resultsDiv = document.getElementById('results');
-    const evidenceLinksDiv = document.getElementById('evidence-links');
-    resultsDiv.innerHTML = '';
-    evidenceLinksDiv.innerHTML = '';
+    clearResults();
+
+    if (result.error) {
+        resultsDiv.innerText = result.error;
+        return;
+    }
 
     if (result.message) {
         resultsDiv.innerText = result.message;
@@ -80,45 +118,50 @@ function displayResults(result) {
     }
 
     if (result.results) {
-        result.results.forEach(item => {
-            // Result Item
-            const resultItem = document.createElement('div');
-            resultItem.classList.add('result-item');
-
-            // Info Section
-            const infoDiv = document.createElement('div');
-            infoDiv.classList.add('info');
-            const claimH3 = document.createElement('h3');
-            claimH3.textContent = `Claim: ${item.claim}`;
-            const classificationP = document.createElement('p');
-            classificationP.innerHTML = `<strong>Classification:</strong> ${item.classification}`;
-            const confidenceP = document.createElement('p');
-            confidenceP.innerHTML = `<strong>Confidence:</strong> ${(item.confidence * 100).toFixed(2)}%`;
-
-            infoDiv.appendChild(claimH3);
-            infoDiv.appendChild(classificationP);
-            infoDiv.appendChild(confidenceP);
-
-            resultItem.appendChild(infoDiv);
-            resultsDiv.appendChild(resultItem);
+        result.results.forEach(appendResult);
+    }
+}
 
-            // Evidence Links for this claim
-            if (item.evidence_links && item.evidence_links.length > 0) {
-                const evidenceHeader = document.createElement('h4');
-                evidenceHeader.textContent = 'Evidence Links:';
-                evidenceLinksDiv.appendChild(evidenceHeader);
+function appendResult(item) {
+    const resultsDiv = document.getElementById('results');
+    const evidenceLinksDiv = document.getElementById('evidence-links');
 
-                item.evidence_links.forEach(link => {
-                    const linkItem = document.createElement('div');
-                    linkItem.classList.add('link-item');
-                    const linkAnchor = document.createElement('a');
-                    linkAnchor.href = link;
-                    linkAnchor.target = '_blank';
-                    linkAnchor.textContent = link;
-                    linkItem.appendChild(linkAnchor);
-                    evidenceLinksDiv.appendChild(linkItem);
-                });
-            }
+    // Result Item
+    const resultItem = document.createElement('div');
+    resultItem.classList.add('result-item');
+
+    // Info Section
+    const infoDiv = document.createElement('div');
+    infoDiv.classList.add('info');
+    const claimH3 = document.createElement('h3');
+    claimH3.textContent = `Claim: ${item.claim}`;
+    const classificationP = document.createElement('p');
+    classificationP.innerHTML = `<strong>Classification:</strong> ${item.classification}`;
+    const confidenceP = document.createElement('p');
+    confidenceP.innerHTML = `<strong>Confidence:</strong> ${(item.confidence * 100).toFixed(2)}%`;
+
+    infoDiv.appendChild(claimH3);
+    infoDiv.appendChild(classificationP);
+    infoDiv.appendChild(confidenceP);
+
+    resultItem.appendChild(infoDiv);
+    resultsDiv.appendChild(resultItem);
+
+    // Evidence Links for this claim
+    if (item.evidence_links && item.evidence_links.length > 0) {
+        const evidenceHeader = document.createElement('h4');
+        evidenceHeader.textContent = 'Evidence Links:';
+        evidenceLinksDiv.appendChild(evidenceHeader);
+
+        item.evidence_links.forEach(link => {
+            const linkItem = document.createElement('div');
+            linkItem.classList.add('link-item');
+            const linkAnchor = document.createElement('a');
+            linkAnchor.href = link;
+            linkAnchor.target = '_blank';
+            linkAnchor.textContent = link;
+            linkItem.appendChild(linkAnchor);
+            evidenceLinksDiv.appendChild(linkItem);
         });
     }
 }